@@ -0,0 +1,236 @@
+"""Generate synthetic raw databases for the import benchmarks.
+
+The files follow the schema populate_database.py reads from database/raw/:
+- song_database.json : a list of anime, each with its names, tags, genres and songs, the
+  songs referencing their vocalists, composers and arrangers by raw artist id
+- artist_database.json : raw artist id -> names and line ups, a line up ("members") being a
+  list of [member artist id, member line up index] pairs
+
+The generation is deterministic for a given seed, and the files are written entry by entry
+so the 1M songs dataset doesn't need to fit in memory.
+
+Usage:
+    python -m benchmarks.generate_dataset --songs 100k --output benchmarks/data/100k
+"""
+
+# Standard libraries
+from pathlib import Path
+import argparse
+import json
+import random
+
+# importer
+from src.importer.mappings import (
+    ANIME_TYPE_MAPPING,
+    SONG_TYPE_MAPPING,
+    SONG_CATEGORY_MAPPING,
+)
+
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+SONG_TYPES = list(SONG_TYPE_MAPPING.values())
+TAG_COUNT = 400
+GENRE_COUNT = 19
+
+
+def parse_size(size: str) -> int:
+    """Parse a number of songs such as 10000, 10k or 1M."""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    suffix = size[-1].lower()
+    if suffix in multipliers:
+        return int(float(size[:-1]) * multipliers[suffix])
+
+    return int(size)
+
+
+def generate_artists(rnd: random.Random, artist_count: int) -> dict:
+    """
+    Generate the artist database, about 15% of the artists being groups.
+
+    Group members are solo artists, sometimes credited in one of their own line ups:
+    a solo artist has no line up, so those references always use -1.
+    """
+
+    group_count = max(1, artist_count * 15 // 100)
+    solo_count = artist_count - group_count
+
+    artists = {}
+    for i in range(solo_count):
+        names = [f"Artist {i}"]
+        names += [f"Artist {i} alias {n}" for n in range(rnd.choice([0, 0, 0, 1, 2]))]
+        artists[str(i)] = {"names": names, "members": []}
+
+    for i in range(solo_count, artist_count):
+        line_ups = []
+        for _ in range(rnd.randint(1, 3)):
+            members = rnd.sample(range(solo_count), min(solo_count, rnd.randint(2, 5)))
+            line_ups.append([[str(member), -1] for member in members])
+        artists[str(i)] = {"names": [f"Group {i}"], "members": line_ups}
+
+    return artists
+
+
+def song_credits(rnd: random.Random, artists: dict, artist_ids: list) -> dict:
+    """Pick the vocalists, composers and arrangers of a song, no artist twice per role."""
+
+    vocalists = []
+    for artist_id in rnd.sample(artist_ids, rnd.choice([1, 1, 1, 2, 3])):
+        line_ups = artists[artist_id]["members"]
+        line_up = rnd.randrange(len(line_ups)) if line_ups else -1
+        vocalists.append([artist_id, line_up])
+
+    return {
+        "artist_ids": vocalists,
+        "composer_ids": [
+            [artist_id, -1] for artist_id in rnd.sample(artist_ids, rnd.randint(0, 2))
+        ],
+        "arranger_ids": [
+            [artist_id, -1] for artist_id in rnd.sample(artist_ids, rnd.randint(0, 2))
+        ],
+    }
+
+
+def generate_anime(rnd: random.Random, artists: dict, song_count: int):
+    """Yield anime entries until song_count songs were generated."""
+
+    artist_ids = list(artists)
+    anime_types = [anime_type for anime_type in ANIME_TYPE_MAPPING if anime_type]
+    song_categories = [category for category in SONG_CATEGORY_MAPPING if category]
+    tags = [f"tag {i}" for i in range(TAG_COUNT)]
+    genres = [f"genre {i}" for i in range(GENRE_COUNT)]
+
+    songs_done = 0
+    ann_id = 0
+    while songs_done < song_count:
+        ann_id += 1
+
+        songs = []
+        song_numbers = {song_type: 0 for song_type in SONG_TYPES}
+        for _ in range(min(rnd.randint(1, 7), song_count - songs_done)):
+            song_type = rnd.choice(SONG_TYPES)
+            song_numbers[song_type] += 1
+            credits = song_credits(rnd, artists, artist_ids)
+            songs.append(
+                {
+                    "songType": song_type,
+                    # insert songs aren't numbered
+                    "songNumber": (
+                        song_numbers[song_type]
+                        if song_type != SONG_TYPE_MAPPING["Insert Song"]
+                        else 0
+                    ),
+                    "songName": f"Song {songs_done + len(songs)}",
+                    "songArtist": " & ".join(
+                        artists[artist_id]["names"][0]
+                        for artist_id, _ in credits["artist_ids"]
+                    ),
+                    "songCategory": rnd.choice(song_categories + [None]),
+                    "songDifficulty": (
+                        round(rnd.uniform(5, 95), 1) if rnd.random() < 0.9 else None
+                    ),
+                    "links": {
+                        key: f"https://example.com/{ann_id}/{len(songs)}.{extension}"
+                        for key, extension in (
+                            ("HQ", "webm"),
+                            ("MQ", "webm"),
+                            ("audio", "mp3"),
+                        )
+                        if rnd.random() < 0.9
+                    },
+                    **credits,
+                }
+            )
+        songs_done += len(songs)
+
+        yield {
+            "annId": ann_id,
+            "animeExpandName": f"Anime {ann_id}",
+            "animeJPName": f"Anime JP {ann_id}" if rnd.random() < 0.8 else None,
+            "animeENName": f"Anime EN {ann_id}" if rnd.random() < 0.5 else None,
+            "altNames": [f"Anime {ann_id} alt {n}" for n in range(rnd.randint(0, 3))],
+            "animeType": rnd.choice(anime_types + [None]),
+            "animeVintage": f"{rnd.choice(SEASONS)} {rnd.randint(1970, 2024)}",
+            "tags": rnd.sample(tags, rnd.randint(0, 8)),
+            "genres": rnd.sample(genres, rnd.randint(0, 4)),
+            "songs": songs,
+        }
+
+
+def write_dataset(
+    output: Path, song_count: int, seed: int = 0, json_lines: bool = False
+):
+    """
+    Write song_database.json and artist_database.json in output.
+
+    Parameters
+    ----------
+    output : Path
+        The folder to write the raw databases to.
+    song_count : int
+        Number of songs to generate, with about one artist per three songs.
+    seed : int
+        Seed of the generation.
+    json_lines : bool
+        Also write the .jsonl variants read by populate_database.py --stream.
+    """
+
+    rnd = random.Random(seed)
+    output.mkdir(parents=True, exist_ok=True)
+
+    artists = generate_artists(rnd, max(10, song_count // 3))
+    with open(output / "artist_database.json", "w", encoding="utf-8") as f:
+        json.dump(artists, f, ensure_ascii=False)
+
+    anime_count = 0
+    with open(output / "song_database.json", "w", encoding="utf-8") as f:
+        json_lines_file = (
+            open(output / "song_database.jsonl", "w", encoding="utf-8")
+            if json_lines
+            else None
+        )
+        f.write("[")
+        for anime in generate_anime(rnd, artists, song_count):
+            entry = json.dumps(anime, ensure_ascii=False)
+            f.write(("," if anime_count else "") + entry)
+            if json_lines_file:
+                json_lines_file.write(entry + "\n")
+            anime_count += 1
+        f.write("]")
+        if json_lines_file:
+            json_lines_file.close()
+
+    if json_lines:
+        with open(output / "artist_database.jsonl", "w", encoding="utf-8") as f:
+            for artist_id, artist in artists.items():
+                f.write(json.dumps([artist_id, artist], ensure_ascii=False) + "\n")
+
+    print(
+        f"{output}: {song_count} songs in {anime_count} anime, {len(artists)} artists"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic raw databases for the import benchmarks."
+    )
+    parser.add_argument(
+        "--songs",
+        type=parse_size,
+        default="10k",
+        help="number of songs to generate, such as 10k, 100k or 1M",
+    )
+    parser.add_argument(
+        "--output", type=Path, required=True, help="folder to write the files to"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="also write the .jsonl variants read by populate_database.py --stream",
+    )
+    args = parser.parse_args()
+
+    write_dataset(args.output, args.songs, seed=args.seed, json_lines=args.jsonl)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Standard libraries
+from pathlib import Path
+import argparse
+import os
+
+# External libraries
+from dotenv import dotenv_values
+
+# ORM
+from sqlalchemy import create_engine
+
+# importer
+from src.importer.export import export_raw_data
+
+# exported data
+export_path = Path("database/export/")
+
+config = {
+    **dotenv_values(".env.shared"),  # load shared development variables
+    **dotenv_values(".env.secret"),  # load sensitive variables
+    **os.environ,  # override loaded values with environment variables
+}
+
+sql_alchemy_uri = f'postgresql://{config["POSTGRES_USER"]}:{config["POSTGRES_PASSWORD"]}@{config["POSTGRES_HOST"]}:{config["POSTGRES_PORT"]}/{config["POSTGRES_DB"]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the database back to the raw AMQ song and artist databases."
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=export_path,
+        help="folder to write song_database.json and artist_database.json to",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="write gzip compressed .json.gz files",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="number of anime / artists read, with their related rows, at a time",
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(sql_alchemy_uri)
+    with engine.connect() as connection:
+        export_raw_data(
+            connection, args.output, compress=args.gzip, batch_size=args.batch_size
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,47 @@
 # Standard libraries
 from pathlib import Path
+import argparse
 import json
 import os
+import sys
 
 # External libraries
 from dotenv import dotenv_values
+from flask import Flask
 
 # models
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from src.models.anime.anime import Anime
-from src.models.anime.anime_type import AnimeType
-from src.models.anime.anime_name_type import AnimeNameType
-from src.models.anime.link_anime_names import LinkAnimeName
-
-from src.models.anime.tag import Tag
-from src.models.anime.link_anime_tags import LinkAnimeTag
-
-from src.models.anime.genre import Genre
-from src.models.anime.link_anime_genres import LinkAnimeGenre
-
-from src.models.artists.artist import Artist
-from src.models.artists.artist_type import ArtistType
-from src.models.artists.link_artist_names import LinkArtistName
-from src.models.artists.line_up import LineUp
-from src.models.artists.link_artist_line_up import LinkArtistLineUp
-
-from src.models.songs.song import Song
-from src.models.songs.song_type import SongType
-from src.models.songs.link_song_artist import LinkSongArtist
+from src.models.schema import upgrade_schema
+from src.models.display_names import rebuild_display_names
+from src.models.search import rebuild_search_documents
+
+# cache
+from src.extensions import cache
+from src.caching import (
+    ANIME,
+    ANIME_NAMES,
+    ARTIST_NAMES,
+    ARTISTS,
+    LINE_UPS,
+    SONG_ARTISTS,
+    SONGS,
+    bump_generations,
+)
+
+# importer
+from src.importer.bulk import bulk_import
+from src.importer.checkpoint import Checkpointer
+from src.importer.delta import delta_import
+from src.importer.pipeline import pipeline_import
+from src.importer.reader import RawDataReader
+from src.importer.session import import_with_session
+from src.importer.validation import check_raw_data, validate_raw_data
 
 # raw data
 raw_data_path = Path("database/raw/")
 
-ANIME_TYPE_MAPPING = {"TV": 1, "movie": 2, "OVA": 3, "ONA": 4, "special": 5, None: None}
-ANIME_NAME_TYPE_MAPPING = {
-    "Expand": 1,
-    "Japanese": 2,
-    "English": 3,
-    "Alternative": 4,
-}
-SONG_CATEGORY_MAPPING = {
-    "Standard": 1,
-    "Chanting": 2,
-    "Character": 3,
-    "Instrumental": 4,
-    None: None,
-}
-ROLE_TYPE_MAPPING = {
-    "Vocalist": 1,
-    "Backing vocals": 2,
-    "Performer": 3,
-    "Composer": 4,
-    "Arranger": 5,
-}
-
-
-artist_id_mapping = {}
-
-
-with open(raw_data_path / "song_database.json", "r", encoding="utf-8") as f:
-    song_database = json.load(f)
-
-with open(raw_data_path / "artist_database.json", "r", encoding="utf-8") as f:
-    artist_database = json.load(f)
-
 config = {
     **dotenv_values(".env.shared"),  # load shared development variables
     **dotenv_values(".env.secret"),  # load sensitive variables
@@ -75,263 +51,156 @@ config = {
 sql_alchemy_uri = f'postgresql://{config["POSTGRES_USER"]}:{config["POSTGRES_PASSWORD"]}@{config["POSTGRES_HOST"]}:{config["POSTGRES_PORT"]}/{config["POSTGRES_DB"]}'
 
 
-def find_artist_from_old_id(artist_id, session):
-    artist = session.query(Artist).filter(
-        Artist.id == artist_id_mapping[artist_id]["new_artist_id"]
-    )
-
-    if artist.count() == 0:
-        return None
-
-    if artist.count() > 1:
-        print(f"Multiple artist found for id {artist_id_mapping[artist_id]}")
-        return None
+def bump_imported_generations():
+    """
+    Start a new generation of everything an import writes, in the cache shared with the
+    web workers, so they load their list pages and artist name index again.
+    """
 
-    return artist.first()
-
-
-# Créez une connexion à la base de données
-engine = create_engine(sql_alchemy_uri)
-# Open a session
-Session = sessionmaker(bind=engine)
-session = Session()
-
-
-# first pass : add artist and names
-for artist_id in artist_database:
-    artist = artist_database[artist_id]
-    new_artist = Artist(
-        **{
-            "id_artist_type": 1 if not artist["members"] else 2,
-        }
+    app = Flask(__name__)
+    app.config.from_mapping(config)
+    app.config.setdefault("CACHE_TYPE", "src.caching.SQLiteCache")
+    app.config["CACHE_DEFAULT_TIMEOUT"] = int(
+        app.config.get("CACHE_DEFAULT_TIMEOUT", 300)
     )
-    session.add(new_artist)
-    session.flush()
-    artist_id_mapping[artist_id] = {
-        "old_artist_id": artist_id,
-        "new_artist_id": new_artist.id,
-    }
-
-    for i, name in enumerate(artist["names"]):
-        new_artist_name = LinkArtistName(
-            **{
-                "id_artist": new_artist.id,
-                "artist_name": name,
-                "order": i + 1,
-            }
+    cache.init_app(app)
+    with app.app_context():
+        bump_generations(
+            SONGS, SONG_ARTISTS, ARTISTS, ARTIST_NAMES, LINE_UPS, ANIME, ANIME_NAMES
         )
-        session.add(new_artist_name)
-        session.flush()
-
-
-# second pass : adding line ups
-for group_id in artist_database:
-    group = artist_database[group_id]
-
-    if not group["members"]:
-        continue
 
-    update_group = find_artist_from_old_id(group_id, session)
 
-    artist_id_mapping[group_id]["line_ups"] = {}
-    for line_up_id, _ in enumerate(group["members"]):
-        new_line_up = LineUp(**{"id_artist": update_group.id})
-        session.add(new_line_up)
-        session.flush()
-        artist_id_mapping[group_id]["line_ups"][line_up_id] = {
-            "old_line_up_id": line_up_id,
-            "new_line_up_id": new_line_up.id,
-        }
-
-# third pass adding members in line ups
-for group_id in artist_database:
-    group = artist_database[group_id]
-
-    if not group["members"]:
-        continue
-
-    for line_up_id, members in enumerate(group["members"]):
-        new_line_up_id = artist_id_mapping[group_id]["line_ups"][line_up_id][
-            "new_line_up_id"
-        ]
-        for member_id, member_line_up_id in members:
-            if member_line_up_id != -1:
-                new_member_line_up_id = artist_id_mapping[member_id]["line_ups"][
-                    member_line_up_id
-                ]["new_line_up_id"]
-            else:
-                new_member_line_up_id = None
-            member = find_artist_from_old_id(member_id, session)
-            new_link_artist_line_up = LinkArtistLineUp(
-                **{
-                    "id_member": member.id,
-                    "id_member_line_up": new_member_line_up_id,
-                    "id_role_type": ROLE_TYPE_MAPPING["Vocalist"],
-                    "id_group": artist_id_mapping[group_id]["new_artist_id"],
-                    "id_group_line_up": new_line_up_id,
-                }
-            )
-            session.add(new_link_artist_line_up)
-            session.flush()
-
-for anime in song_database:
-    new_anime = Anime(
-        **{
-            "ann_id": anime["annId"],
-            "id_anime_type": ANIME_TYPE_MAPPING[anime.get("animeType", None)],
-            "anime_vintage": anime.get("animeVintage", None),
-        }
+def main():
+    parser = argparse.ArgumentParser(
+        description="Populate the database from the raw AMQ song and artist databases."
     )
-    session.add(new_anime)
-    # Flush the session to get the id assigned by the database
-    session.flush()
-
-    new_anime_name = LinkAnimeName(
-        **{
-            "id_anime": new_anime.id,
-            "id_anime_name_type": ANIME_NAME_TYPE_MAPPING["Expand"],
-            "anime_name": anime["animeExpandName"],
-        }
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--bulk",
+        action="store_true",
+        help="stage every table in memory with client-side ids and write it with COPY, "
+        "instead of flushing row by row. Meant for a full load into an empty schema.",
     )
-    session.add(new_anime_name)
-
-    if anime.get("animeJPName", None):
-        new_anime_name = LinkAnimeName(
-            **{
-                "id_anime": new_anime.id,
-                "id_anime_name_type": ANIME_NAME_TYPE_MAPPING["Japanese"],
-                "anime_name": anime["animeJPName"],
-            }
-        )
-        session.add(new_anime_name)
-
-    if anime.get("animeENName", None):
-        new_anime_name = LinkAnimeName(
-            **{
-                "id_anime": new_anime.id,
-                "id_anime_name_type": ANIME_NAME_TYPE_MAPPING["English"],
-                "anime_name": anime["animeENName"],
-            }
-        )
-        session.add(new_anime_name)
-
-    for alt_name in anime.get("altNames", []):
-        new_anime_name = LinkAnimeName(
-            **{
-                "id_anime": new_anime.id,
-                "id_anime_name_type": ANIME_NAME_TYPE_MAPPING["Alternative"],
-                "anime_name": alt_name,
-            }
-        )
-        session.add(new_anime_name)
-
-    session.flush()
-
-    for tag in anime.get("tags", []):
-        # check tag is not already in database
-        tag_query = session.query(Tag).filter(Tag.tag == tag)
-        if tag_query.count() == 0:
-            new_tag = Tag(**{"tag": tag})
-            session.add(new_tag)
-            session.flush()
-        else:
-            new_tag = tag_query.first()
-
-        # link anime to tag
-        new_link_anime_tag = LinkAnimeTag(
-            **{"id_anime": new_anime.id, "id_tag": new_tag.id}
-        )
-        session.add(new_link_anime_tag)
-        session.flush()
-
-    for genre in anime.get("genres", []):
-        # check genre is not already in database
-        genre_query = session.query(Genre).filter(Genre.genre == genre)
-
-        if genre_query.count() == 0:
-            new_genre = Genre(**{"genre": genre})
-            session.add(new_genre)
-            session.flush()
-        else:
-            new_genre = genre_query.first()
-
-        # link anime to genre
-        new_link_anime_genre = LinkAnimeGenre(
-            **{"id_anime": new_anime.id, "id_genre": new_genre.id}
-        )
-        session.add(new_link_anime_genre)
-        session.flush()
-
-    for song in anime["songs"]:
-        new_song = Song(
-            **{
-                "id_anime": new_anime.id,
-                "id_song_type": song["songType"],
-                "song_number": song["songNumber"] or None,
-                "song_name": song["songName"],
-                "song_artist": song["songArtist"],
-                "id_song_category": SONG_CATEGORY_MAPPING[
-                    song.get("songCategory", None)
-                ],
-                "song_difficulty": song.get("songDifficulty", None),
-                "HQ": song["links"].get("HQ", None),
-                "MQ": song["links"].get("MQ", None),
-                "audio": song["links"].get("audio", None),
-            }
-        )
-
-        session.add(new_song)
-        session.flush()
-
-        for artist_id, line_up_id in song["artist_ids"]:
-            if line_up_id != -1:
-                new_line_up_id = artist_id_mapping[artist_id]["line_ups"][line_up_id][
-                    "new_line_up_id"
-                ]
-            else:
-                new_line_up_id = None
-            artist = find_artist_from_old_id(artist_id, session)
-            new_link_song_artist = LinkSongArtist(
-                **{
-                    "id_song": new_song.id,
-                    "id_artist": artist.id,
-                    "id_artist_line_up": new_line_up_id,
-                    "id_role_type": ROLE_TYPE_MAPPING["Vocalist"],
-                }
-            )
-            session.add(new_link_song_artist)
-
-        for composer_id, _ in song["composer_ids"]:
-            composer = find_artist_from_old_id(composer_id, session)
-            new_link_song_artist = LinkSongArtist(
-                **{
-                    "id_song": new_song.id,
-                    "id_artist": composer.id,
-                    "id_artist_line_up": None,
-                    "id_role_type": ROLE_TYPE_MAPPING["Composer"],
-                }
+    mode.add_argument(
+        "--delta",
+        action="store_true",
+        help="only upsert the anime and songs whose content changed since the previous "
+        "import, matched with artist_id_mapping.json. Moderator edits are preserved.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10000,
+        help="number of rows per COPY / INSERT statement in bulk mode",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="parse the raw databases one entry at a time (from the .jsonl variants "
+        "when present, else with ijson) so memory stays flat as the dataset grows",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1000,
+        help="number of anime / artists transformed and written per chunk",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="in bulk mode, transform the anime in this many worker processes while the "
+        "main process writes the rows (0 transforms them in the main process)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the previous import from its last committed chunk instead of "
+        "starting over. The artists and every anime chunk are committed as they go.",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="only check every reference of the raw databases and print the JSON "
+        "report, without touching the database. Imports always run this check first.",
+    )
+    args = parser.parse_args()
+    if args.workers and not args.bulk:
+        parser.error("--workers needs --bulk")
+    if args.resume and args.delta:
+        parser.error("--delta already skips what is imported, it can't --resume")
+
+    reader = RawDataReader(raw_data_path, stream=args.stream)
+
+    if args.validate:
+        report = validate_raw_data(reader)
+        print(json.dumps(report, indent=4))
+        sys.exit(0 if report["valid"] else 1)
+
+    # reject a broken dump before any database work
+    check_raw_data(reader)
+
+    # Créez une connexion à la base de données
+    engine = create_engine(sql_alchemy_uri)
+
+    with engine.begin() as connection:
+        upgrade_schema(connection)
+
+    if args.delta:
+        with open(raw_data_path / "artist_id_mapping.json", "r", encoding="utf-8") as f:
+            previous_artist_id_mapping = json.load(f)
+        with engine.begin() as connection:
+            artist_id_mapping = delta_import(
+                connection,
+                reader,
+                previous_artist_id_mapping,
+                chunk_size=args.chunk_size,
             )
-            session.add(new_link_song_artist)
+    elif args.bulk:
+        # commit as we go: each chunk is committed along with its checkpoint
+        with engine.connect() as connection:
+            checkpointer = Checkpointer(connection.commit, resume=args.resume)
+            if args.workers:
+                artist_id_mapping = pipeline_import(
+                    connection,
+                    reader,
+                    workers=args.workers,
+                    batch_size=args.batch_size,
+                    chunk_size=args.chunk_size,
+                    checkpointer=checkpointer,
+                )
+            else:
+                artist_id_mapping = bulk_import(
+                    connection,
+                    reader,
+                    batch_size=args.batch_size,
+                    chunk_size=args.chunk_size,
+                    checkpointer=checkpointer,
+                )
+    else:
+        # Open a session
+        Session = sessionmaker(bind=engine)
+        session = Session()
+        artist_id_mapping = import_with_session(
+            session,
+            reader,
+            chunk_size=args.chunk_size,
+            checkpointer=Checkpointer(session.commit, resume=args.resume),
+        )
+        session.close()
 
-        for arranger_id, _ in song["arranger_ids"]:
-            arranger = find_artist_from_old_id(arranger_id, session)
-            new_link_song_artist = LinkSongArtist(
-                **{
-                    "id_song": new_song.id,
-                    "id_artist": arranger.id,
-                    "id_artist_line_up": None,
-                    "id_role_type": ROLE_TYPE_MAPPING["Arranger"],
-                }
-            )
-            session.add(new_link_song_artist)
+    # the imported rows have no display name nor full-text search document yet
+    with engine.begin() as connection:
+        rebuild_display_names(connection)
+        rebuild_search_documents(connection)
 
-        session.flush()
+    # the web workers would serve the pages cached before the import otherwise
+    bump_imported_generations()
 
+    # save new mapping
+    with open(raw_data_path / "artist_id_mapping.json", "w", encoding="utf-8") as f:
+        json.dump(artist_id_mapping, f, indent=4)
 
-# save new mapping
-with open(raw_data_path / "artist_id_mapping.json", "w", encoding="utf-8") as f:
-    json.dump(artist_id_mapping, f, indent=4)
 
-# close session
-session.commit()
-session.close()
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ from src import routes
 
 # extensions
 from src.extensions import cache, csrf_protect, db, override_url_for
+from src.json_provider import JSONProvider
+from src.models.schema import upgrade_schema
 
 
 def create_app():
@@ -56,6 +58,10 @@ def register_config(app):
 
     # Set up cache
     app.config["TEMPLATES_AUTO_RELOAD"] = True
+    app.config.setdefault("CACHE_TYPE", "src.caching.SQLiteCache")
+    app.config["CACHE_DEFAULT_TIMEOUT"] = int(
+        app.config.get("CACHE_DEFAULT_TIMEOUT", 300)
+    )
 
     # Set the secret key to some random bytes. Keep this really secret!
     app.secret_key = config["APP_SESSION_SECRET_KEY"]
@@ -68,10 +74,14 @@ def register_extensions(app):
     app.context_processor(override_url_for)
 
     """Register Flask extensions."""
+    # encode the JSON responses with orjson when it is installed
+    app.json = JSONProvider(app, app.config.get("JSON_ENCODER", "orjson"))
     cache.init_app(app)
     db.init_app(app)
     with app.app_context():
         db.create_all()
+        with db.engine.begin() as connection:
+            upgrade_schema(connection)
 
     # TODO: break api POST/DELETE/PUT request ??
     # csrf_protect.init_app(app)
@@ -90,6 +100,8 @@ def register_blueprint(app):
     app.register_blueprint(admin_ui.auth.blueprint)
     app.register_blueprint(routes.blueprint)
     app.register_blueprint(admin_ui.autocomplete.blueprint)
+    app.register_blueprint(admin_ui.export.blueprint)
+    app.register_blueprint(admin_ui.search.blueprint)
 
     return None
 
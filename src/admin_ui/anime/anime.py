@@ -1,5 +1,5 @@
 # flask
-from flask import Blueprint, render_template, redirect, session, request
+from flask import Blueprint, abort, render_template, redirect, session, request
 from flask import current_app as app
 
 # models
@@ -22,12 +22,22 @@ from src.admin_ui.auth import authorized
 
 # utils
 from src.utils import validate_sqla_object
-from src.admin_ui.utils import get_query_args, populate_url_with_args
+from src.caching import ANIME, ANIME_NAMES, bump_generations
+from src.admin_ui.utils import (
+    cached_list,
+    get_query_args,
+    paginate,
+    populate_url_with_args,
+    sort_query,
+)
+
+# ORM
+import sqlalchemy as sa
+from sqlalchemy.orm import joinedload, selectinload
 
 # Typing helpers
 from sqlalchemy.orm import Query
 
-
 # ---- Admin UI Anime ---- #
 blueprint = Blueprint("anime", __name__, url_prefix="/anime/")
 
@@ -35,6 +45,7 @@ blueprint = Blueprint("anime", __name__, url_prefix="/anime/")
 def filter_anime(
     query: Query,
     anime_name: str = None,
+    id_anime_name_type: str = None,
     sort_by: str = "id",
     order: str = "asc",
     **unfilteredArgs: any,
@@ -47,7 +58,9 @@ def filter_anime(
     query : SQLAlchemy query
         The query to filter
     anime_name : str
-        The name of the anime to filter on
+        The name of the anime to filter on, searched in every name of the anime
+    id_anime_name_type : str
+        The id of the only name type to search anime_name in
     **unfilteredArgs : any
         Other args that are not used for filtering
 
@@ -57,20 +70,22 @@ def filter_anime(
         The filtered query
     """
 
+    # EXISTS rather than a join, so an anime matching with several names comes once.
+    # The names are found with the trigram indexes of Link_Anime_Name, or probed per
+    # anime with its (id_anime, id_anime_name_type, anime_name) unique index
     if anime_name:
-        query = query.filter(
-            Anime.anime_expand_name.ilike(f"%{anime_name}%")
-            | Anime.original_anime_expand_name.ilike(f"%{anime_name}%")
-            | Anime.anime_jp_name.ilike(f"%{anime_name}%")
-            | Anime.original_anime_jp_name.ilike(f"%{anime_name}%")
-            | Anime.anime_en_name.ilike(f"%{anime_name}%")
-            | Anime.original_anime_en_name.ilike(f"%{anime_name}%")
+        name_filter = sa.or_(
+            LinkAnimeName.anime_name.ilike(f"%{anime_name}%"),
+            LinkAnimeName.original_anime_name.ilike(f"%{anime_name}%"),
         )
+        if id_anime_name_type:
+            name_filter = sa.and_(
+                name_filter, LinkAnimeName.id_anime_name_type == int(id_anime_name_type)
+            )
+        query = query.filter(Anime.names.any(name_filter))
 
-    # sorting
-    # Check if the provided sort_by is a valid attribute of SiteGeneration
-    if hasattr(Anime, sort_by) and not sort_by.startswith("_"):
-        query = query.order_by(getattr(getattr(Anime, sort_by), order)())
+    # sorting, on a column of Anime and then on id so the order is stable
+    query = sort_query(query, Anime, sort_by, order)
 
     return query
 
@@ -85,6 +100,11 @@ def anime_read():
 
     form = AnimeSearchForm(**query_args)
 
+    # only the name types of the search form can be searched in
+    id_anime_name_type = query_args.get("id_anime_name_type", "")
+    if id_anime_name_type not in dict(form.id_anime_name_type.choices):
+        abort(400, f"{id_anime_name_type} is not a valid name type")
+
     # if form is submitted, search anime in database
     if form.validate_on_submit():
         # retrieve form data excluding csrf_token
@@ -101,41 +121,47 @@ def anime_read():
         except Exception as e:
             return f"There was an issue performing the search: {e}"
 
-    # get filtered anime from database
-    query = db.session.query(Anime)
-    query = filter_anime(query, **query_args)
-    animes = query.all()
-
-    # get total pages
-    total_pages = len(animes) // query_args["page_size"] + 1
+    def load_anime():
+        # get filtered anime from database
+        # the genres, tags and type of the page are loaded with one query each, the
+        # name shown being the display_name
+        query = db.session.query(Anime).options(
+            joinedload(Anime.anime_type),
+            selectinload(Anime.genres).joinedload(LinkAnimeGenre.genre),
+            selectinload(Anime.tags).joinedload(LinkAnimeTag.tag),
+        )
+        query = filter_anime(query, **query_args)
 
-    # paginate anime
-    animes = animes
+        # load the current page in the database, numbered or following a cursor
+        animes, pagination = paginate(query, Anime, query_args, [ANIME, ANIME_NAMES])
 
-    # deserizalize anime
-    animes = [
-        deserialize_anime(
-            anime, extend_names=True, extend_genres=True, extend_tags=True
-        )
-        for anime in animes[
-            (query_args["page"] - 1)
-            * query_args["page_size"] : query_args["page"]
-            * query_args["page_size"]
+        # deserizalize anime
+        animes = [
+            deserialize_anime(anime, extend_genres=True, extend_tags=True)
+            for anime in animes
         ]
-    ]
 
-    for anime in animes:
-        anime["anime_name"] = anime.pop("names")[0]["anime_name"]
-        anime["anime_genres"] = ", ".join([genre for genre in anime.pop("genres", [])])
-        anime["anime_tags"] = ", ".join([genre for genre in anime.pop("tags", [])])
+        for anime in animes:
+            anime["anime_name"] = anime.pop("display_name")
+            anime["anime_genres"] = ", ".join(
+                [genre for genre in anime.pop("genres", [])]
+            )
+            anime["anime_tags"] = ", ".join([genre for genre in anime.pop("tags", [])])
+
+        return animes, pagination
+
+    # reuse the page if it was loaded with the same args since the last anime or name
+    # write
+    animes, pagination = cached_list(
+        "anime", query_args, [ANIME, ANIME_NAMES], load_anime
+    )
 
     # render template w/ anime
     return render_template(
         "anime/read.jinja2",
         form=form,
         animes=animes,
-        current_page=query_args["page"],
-        total_pages=total_pages,
+        **pagination,
         username=session["username"],
     )
 
@@ -167,6 +193,7 @@ def anime_update(ann_id):
             # update anime in database
             db.session.query(Anime).filter_by(ann_id=ann_id).update({**form_data})
             db.session.commit()
+            bump_generations(ANIME)
             return redirect(f"/anime/{ann_id}")
         except ValueError as e:
             args = e.args[0]
@@ -1,17 +1,18 @@
 # flask
 from flask import Blueprint, jsonify, redirect, session, request
 from flask import current_app as app
-import json
 
 # models
 from src.extensions import db
 from src.models.anime.link_anime_names import LinkAnimeName
+from src.models.search import refresh_search_documents
 
 # authentification
 from src.admin_ui.auth import authorized
 
 # utils
 from src.utils import validate_sqla_object
+from src.caching import ANIME_NAMES, bump_generations
 from src.admin_ui.utils import get_query_args, populate_url_with_args
 
 # Typing helpers
@@ -39,8 +40,11 @@ def anime_update_name(id_anime, id_name):
 
     try:
         link_anime_name.original_anime_name = original_anime_name or None
+        db.session.flush()
+        refresh_search_documents(db.session, anime_ids=[id_anime])
         db.session.commit()
+        bump_generations(ANIME_NAMES)
     except Exception as e:
         return f"There was an issue updating the name from the anime: {e}"
 
-    return json.dumps(link_anime_name.as_dict())
+    return jsonify(link_anime_name.as_dict())
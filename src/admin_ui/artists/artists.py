@@ -6,14 +6,24 @@ import json
 # models
 from src.extensions import db
 from src.models.artists.artist import ArtistSearchForm, ArtistUpdateForm, Artist
+from src.models.artists.artist_type import ArtistType
 from src.models.artists.link_artist_names import LinkArtistName
+from src.models.artists.artist_name_index import artist_name_index
+from src.models.search import refresh_search_documents
 
 # authentification
 from src.admin_ui.auth import authorized
 
 # utils
 from src.utils import validate_sqla_object
-from src.admin_ui.utils import get_query_args, populate_url_with_args
+from src.caching import ARTISTS, ARTIST_NAMES
+from src.admin_ui.utils import (
+    cached_list,
+    get_query_args,
+    paginate,
+    populate_url_with_args,
+    sort_query,
+)
 
 # Typing helpers
 from sqlalchemy.orm import Query
@@ -47,30 +57,29 @@ def filter_artists(
         The filtered query
     """
 
+    # EXISTS rather than a join, so an artist matching with several names comes once
     if artist_name:
-        query = query.join(LinkArtistName)
         query = query.filter(
-            LinkArtistName.artist_name.ilike(f"%{artist_name}%")
-            | LinkArtistName.original_artist_name.ilike(f"%{artist_name}%")
+            Artist.artist_names.any(
+                LinkArtistName.artist_name.ilike(f"%{artist_name}%")
+                | LinkArtistName.original_artist_name.ilike(f"%{artist_name}%")
+            )
         )
 
-    # sorting
-    # Check if the provided sort_by is a valid attribute of SiteGeneration
-    if hasattr(Artist, sort_by) and not sort_by.startswith("_"):
-        query = query.order_by(getattr(getattr(Artist, sort_by), order)())
+    # sorting, on a column of Artist and then on id so the order is stable
+    query = sort_query(query, Artist, sort_by, order)
 
     return query
 
 
-def deserialize_artist(artist):
+def deserialize_artist(artist, artist_type: str):
     deserialized_artist = artist.as_dict()
-    deserialized_artist["artist_names"] = []
-    # ordered by name.id
-    for artist_name in sorted(artist.artist_names, key=lambda x: x.order):
-        deserialized_artist["artist_names"].append(artist_name.as_dict())
-        deserialized_artist["artist_names"][-1].pop("id_artist")
-
-    deserialized_artist["artist_type"] = artist.artist_type.artist_type
+    deserialized_artist["artist_type"] = artist_type
+    deserialized_artist["artist_name"] = deserialized_artist.pop("display_name") or ""
+    # TODO find a better way to swap order
+    deserialized_artist["artist_disambiguation"] = deserialized_artist.pop(
+        "artist_disambiguation"
+    )
     return deserialized_artist
 
 
@@ -102,38 +111,37 @@ def artists_read():
     else:
         print("form not validated : ", form.errors)
 
-    # get filtered artists from database
-    query = db.session.query(Artist)
-    query = filter_artists(query, **query_args)
-    artists = query.all()
+    def load_artists():
+        # get filtered artists from database
+        # with their type in the same query, their primary name being their display_name
+        query = db.session.query(Artist, ArtistType.artist_type).join(
+            Artist.artist_type
+        )
+        query = filter_artists(query, **query_args)
+
+        # load the current page in the database, numbered or following a cursor
+        artists, pagination = paginate(
+            query, Artist, query_args, [ARTISTS, ARTIST_NAMES]
+        )
 
-    # get total pages
-    total_pages = len(artists) // query_args["page_size"] + 1
+        deserialized_artists = [
+            deserialize_artist(artist, artist_type) for artist, artist_type in artists
+        ]
 
-    # paginate artists
-    artists = artists[
-        (query_args["page"] - 1)
-        * query_args["page_size"] : query_args["page"]
-        * query_args["page_size"]
-    ]
+        return deserialized_artists, pagination
 
-    deserialized_artists = [deserialize_artist(artist) for artist in artists]
-    # TODO find a better way to swap order
-    for artist in deserialized_artists:
-        artist["artist_name"] = (
-            artist.pop("artist_names")[0]["artist_name"]
-            if artist["artist_names"]
-            else ""
-        )
-        artist["artist_disambiguation"] = artist.pop("artist_disambiguation")
+    # reuse the page if it was loaded with the same args since the last artist or name
+    # write
+    deserialized_artists, pagination = cached_list(
+        "artists", query_args, [ARTISTS, ARTIST_NAMES], load_artists
+    )
 
     # render template w/ artists
     return render_template(
         "artists/read.jinja2",
         form=form,
         artists=deserialized_artists,
-        current_page=query_args["page"],
-        total_pages=total_pages,
+        **pagination,
         username=session["username"],
     )
 
@@ -161,7 +169,11 @@ def artist_create():
             artist = Artist(**form_data)
             # update artist in database
             db.session.add(artist)
+            db.session.flush()
+            refresh_search_documents(db.session, artist_ids=[artist.id])
             db.session.commit()
+            # new generation of the artists, reloading the artist in the name index
+            artist_name_index.refresh(db.session, artist.id, ARTISTS)
             return redirect(f"/artists/{artist.id}")
         except ValueError as e:
             args = e.args[0]
@@ -207,7 +219,9 @@ def artist_update(id_artist):
             validate_sqla_object(Artist, form_data)
             # update artist in database
             db.session.query(Artist).filter_by(id=id_artist).update({**form_data})
+            refresh_search_documents(db.session, artist_ids=[id_artist])
             db.session.commit()
+            artist_name_index.refresh(db.session, id_artist, ARTISTS)
             return redirect(f"/artists/{id_artist}")
         except ValueError as e:
             args = e.args[0]
@@ -243,6 +257,8 @@ def artist_delete(id_artist):
     try:
         db.session.query(Artist).filter_by(id=id_artist).delete()
         db.session.commit()
+        # drops the artist from the autocompletion, starting a new ARTISTS generation
+        artist_name_index.refresh(db.session, id_artist, ARTISTS)
     except Exception as e:
         return f"There was an issue deleting your artist: {e}"
 
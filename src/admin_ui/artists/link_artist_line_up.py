@@ -15,6 +15,7 @@ from src.admin_ui.auth import authorized
 
 # utils
 from src.utils import validate_sqla_object
+from src.caching import LINE_UPS, SONG_ARTISTS, bump_generations
 from src.admin_ui.utils import get_query_args, populate_url_with_args
 
 # Typing helpers
@@ -118,6 +119,8 @@ def add_line_up(id_artist):
         )
 
     db.session.commit()
+    # the songs of the artist may have been moved to the new line up
+    bump_generations(LINE_UPS, SONG_ARTISTS)
 
     return jsonify({"new_line_up": new_line_up.as_dict(), "feedback": message})
 
@@ -172,6 +175,7 @@ def remove_line_up(id_line_up):
     # else possible to delete
     db.session.delete(line_up)
     db.session.commit()
+    bump_generations(LINE_UPS, SONG_ARTISTS)
 
     return jsonify({"deleted_line_up": line_up.as_dict(), "feedback": message})
 
@@ -219,6 +223,7 @@ def add_line_up_member(id_line_up):
 
     db.session.add(new_member)
     db.session.commit()
+    bump_generations(LINE_UPS)
 
     print(new_member.as_dict())
 
@@ -230,5 +235,6 @@ def remove_line_up_member(id_link_artist_line_up):
     link_artist_line_up = LinkArtistLineUp.query.get(id_link_artist_line_up)
     db.session.delete(link_artist_line_up)
     db.session.commit()
+    bump_generations(LINE_UPS)
 
     return jsonify(link_artist_line_up.as_dict())
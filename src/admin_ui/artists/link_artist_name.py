@@ -1,18 +1,21 @@
 # flask
 from flask import Blueprint, jsonify, redirect, session, request
 from flask import current_app as app
-import json
 
 # models
 from src.extensions import db
 from src.models.artists.artist import ArtistSearchForm, ArtistUpdateForm, Artist
 from src.models.artists.link_artist_names import LinkArtistName
+from src.models.artists.artist_name_index import artist_name_index
+from src.models.display_names import refresh_display_names
+from src.models.search import refresh_search_documents
 
 # authentification
 from src.admin_ui.auth import authorized
 
 # utils
 from src.utils import validate_sqla_object
+from src.caching import ARTIST_NAMES
 from src.admin_ui.utils import get_query_args, populate_url_with_args
 
 # Typing helpers
@@ -60,11 +63,16 @@ def artist_add_name(id_artist):
             order=last_order.order + 1 if last_order else 0,
         )
         db.session.add(link_artist_name)
+        db.session.flush()
+        refresh_display_names(db.session, artist_ids=[id_artist])
+        refresh_search_documents(db.session, artist_ids=[id_artist])
         db.session.commit()
+        # new generation of the names, reloading the artist in the name index
+        artist_name_index.refresh(db.session, id_artist, ARTIST_NAMES)
     except Exception as e:
         return f"There was an issue adding the name to the artist: {e}"
 
-    return json.dumps(link_artist_name.as_dict())
+    return jsonify(link_artist_name.as_dict())
 
 
 @blueprint.route("<int:id_artist>/names/<int:name_id>", methods=["DELETE"])
@@ -96,14 +104,18 @@ def artist_remove_name(id_artist, name_id):
 
         # delete the name
         db.session.delete(link_artist_name)
+        db.session.flush()
+        refresh_display_names(db.session, artist_ids=[id_artist])
+        refresh_search_documents(db.session, artist_ids=[id_artist])
         db.session.commit()
+        artist_name_index.refresh(db.session, id_artist, ARTIST_NAMES)
     except Exception as e:
         return (
             jsonify(f"There was an error deleting the name : {e}"),
             500,
         )
 
-    return json.dumps(link_artist_name.as_dict())
+    return jsonify(link_artist_name.as_dict())
 
 
 @blueprint.route("<int:id_artist>/names/<int:name_id>", methods=["PUT"])
@@ -123,11 +135,15 @@ def artist_update_name(id_artist, name_id):
     try:
         link_artist_name.artist_name = artist_name or None
         link_artist_name.original_artist_name = original_artist_name or None
+        db.session.flush()
+        refresh_display_names(db.session, artist_ids=[id_artist])
+        refresh_search_documents(db.session, artist_ids=[id_artist])
         db.session.commit()
+        artist_name_index.refresh(db.session, id_artist, ARTIST_NAMES)
     except Exception as e:
         return f"There was an issue updating the name from the artist: {e}"
 
-    return json.dumps(link_artist_name.as_dict())
+    return jsonify(link_artist_name.as_dict())
 
 
 @blueprint.route("<int:id_artist>/names/reorder/", methods=["PUT"])
@@ -151,7 +167,9 @@ def artist_reorder_names(id_artist):
             LinkArtistName.query.filter_by(id=order["id"]).update(
                 {"order": order["order"]}
             )
+        refresh_display_names(db.session, artist_ids=[id_artist])
         db.session.commit()
+        artist_name_index.refresh(db.session, id_artist, ARTIST_NAMES)
     except Exception as e:
         return f"There was an issue updating the order of the names: {e}"
 
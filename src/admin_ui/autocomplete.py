@@ -4,9 +4,8 @@ from flask import current_app as app
 
 # models
 from src.extensions import db
-from src.models.artists.artist import Artist, deserialize_artist
-from src.models.artists.link_artist_names import LinkArtistName
 from src.models.artists.line_up import LineUp, deserialize_line_up
+from src.models.artists.artist_name_index import artist_name_index
 
 # authentification
 from src.admin_ui.auth import authorized
@@ -14,11 +13,11 @@ from src.admin_ui.auth import authorized
 # utils
 from src.utils import validate_sqla_object
 from src.admin_ui.utils import get_query_args, populate_url_with_args
+from src.json_provider import stream_json
 
 # Typing helpers
 from sqlalchemy.orm import Query
 
-
 # ---- Admin UI Anime ---- #
 blueprint = Blueprint("autocomplete", __name__, url_prefix="/autocomplete/")
 
@@ -30,19 +29,10 @@ def autocomplete_artist():
     search = query_args.get("search", None)
     limit = query_args.get("limit", 100)
 
-    artists = (
-        Artist.query.join(LinkArtistName)
-        .filter(
-            LinkArtistName.artist_name.ilike(f"%{search}%")
-            | LinkArtistName.original_artist_name.ilike(f"%{search}%")
-        )
-        .limit(limit)
-        .all()
-    )
-
-    artists = [deserialize_artist(artist, extend_names=True) for artist in artists]
+    # answered from the in-memory artist name index, without querying the database
+    artists = artist_name_index.search(db.session, search, int(limit))
 
-    return artists
+    return stream_json(artists)
 
 
 @blueprint.route("/line_ups", methods=["GET"])
@@ -55,4 +45,7 @@ def autocomplete_line_up():
 
     line_ups = LineUp.query.filter(LineUp.id_artist == id_artist).all()
 
-    return [deserialize_line_up(line_up, extend_members=True) for line_up in line_ups]
+    # each line up is deserialized, with its members, when it is streamed
+    return stream_json(
+        deserialize_line_up(line_up, extend_members=True) for line_up in line_ups
+    )
@@ -0,0 +1,33 @@
+# flask
+from flask import Blueprint, Response, request, stream_with_context
+
+# models
+from src.extensions import db
+
+# authentification
+from src.admin_ui.auth import authorized
+
+# importer
+from src.importer.export import iter_export
+
+# ---- Admin UI Export ---- #
+blueprint = Blueprint("export", __name__, url_prefix="/export/")
+
+
+@blueprint.route("/<any(song_database, artist_database):database>.json")
+@authorized
+def export_database(database: str):
+    """Stream a raw database rebuilt from the moderated data, gzipped with ?gzip=1."""
+
+    compress = request.args.get("gzip", "0") not in ("0", "false", "")
+    filename = f"{database}.json{'.gz' if compress else ''}"
+
+    def generate():
+        with db.engine.connect() as connection:
+            yield from iter_export(connection, database, compress=compress)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/gzip" if compress else "application/json",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
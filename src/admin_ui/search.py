@@ -0,0 +1,55 @@
+# flask
+from flask import Blueprint, request
+
+# models
+from src.extensions import db
+from src.models.search import search_statement
+
+# authentification
+from src.admin_ui.auth import authorized
+
+# utils
+from src.admin_ui.utils import MAX_PAGE_SIZE, get_query_args
+
+# ---- Admin UI Search ---- #
+blueprint = Blueprint("search", __name__, url_prefix="/search/")
+
+# pages of the admin UI showing each type of result, by the page_id of the result
+RESULT_URLS = {
+    "song": "/songs/{page_id}/",
+    "anime": "/anime/{page_id}/",
+    "artist": "/artists/{page_id}/",
+}
+
+
+@blueprint.route("/", methods=["GET"])
+@authorized
+def search():
+    """
+    Search the songs, anime and artists at once, in their full-text search documents.
+
+    Returns the results best ranked first, each with its type, id, label, detail, rank
+    and the url of its page.
+    """
+
+    query_args = get_query_args(request)
+    search = query_args.get("search", None)
+    limit = min(int(query_args.get("limit", 50)), MAX_PAGE_SIZE)
+
+    if not search:
+        return []
+
+    if db.engine.dialect.name != "postgresql":
+        return {"error": "The full-text search needs PostgreSQL"}, 501
+
+    return [
+        {
+            "type": result.type,
+            "id": result.id,
+            "label": result.label,
+            "detail": result.detail,
+            "rank": round(result.rank, 4),
+            "url": RESULT_URLS[result.type].format(page_id=result.page_id),
+        }
+        for result in db.session.execute(search_statement(search, limit))
+    ]
@@ -1,7 +1,5 @@
-import json
-
 # flask
-from flask import Blueprint, render_template, redirect, session, request
+from flask import Blueprint, jsonify, render_template, redirect, session, request
 from flask import current_app as app
 
 # models
@@ -9,13 +7,15 @@ from src.extensions import db
 from src.models.songs.song import SongSearchForm, SongUpdateForm, Song
 from src.models.songs.link_song_artist import LinkSongArtist
 from src.models.artists.line_up import LineUp
-from src.models.artists.role_type import RoleType
+from src.models.artists.role_type import role_types
+from src.models.search import refresh_search_documents
 
 # authentification
 from src.admin_ui.auth import authorized
 
 # utils
 from src.utils import validate_sqla_object
+from src.caching import SONG_ARTISTS, bump_generations
 from src.admin_ui.utils import get_query_args, populate_url_with_args
 
 # Typing helpers
@@ -34,10 +34,8 @@ def link_song_artist():
     id_song = request_body.get("id_song", None)
     id_role_type = request_body.get("id_role_type", None)
 
-    if type(id_role_type) is str:
-        if RoleType.query.filter_by(role_type=id_role_type).count() == 1:
-            print("found role type")
-            id_role_type = RoleType.query.filter_by(role_type=id_role_type).first().id
+    if type(id_role_type) is str and role_types.id(id_role_type) is not None:
+        id_role_type = role_types.id(id_role_type)
 
     if not id_artist_line_up:
         # check if it has a line up anyway
@@ -59,12 +57,15 @@ def link_song_artist():
             id_role_type=id_role_type,
         )
         db.session.add(link_song_artist)
+        db.session.flush()
+        refresh_search_documents(db.session, song_ids=[link_song_artist.id_song])
         db.session.commit()
+        bump_generations(SONG_ARTISTS)
     except Exception as e:
         print(f"There was an issue adding the artist to the song: {e}")
         return f"There was an issue adding the artist to the song: {e}"
 
-    return json.dumps(link_song_artist.as_dict())
+    return jsonify(link_song_artist.as_dict())
 
 
 @blueprint.route("artists/<int:id_song_artist>", methods=["DELETE"])
@@ -72,8 +73,11 @@ def unlink_song_artist(id_song_artist):
     try:
         link_song_artist = LinkSongArtist.query.get(id_song_artist)
         db.session.delete(link_song_artist)
+        db.session.flush()
+        refresh_search_documents(db.session, song_ids=[link_song_artist.id_song])
         db.session.commit()
+        bump_generations(SONG_ARTISTS)
     except Exception as e:
         return f"There was an issue adding the artist to the song: {e}"
 
-    return json.dumps(link_song_artist.as_dict())
+    return jsonify(link_song_artist.as_dict())
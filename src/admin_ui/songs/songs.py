@@ -6,14 +6,23 @@ from flask import current_app as app
 from src.extensions import db
 from src.models.songs.song import SongSearchForm, SongUpdateForm, Song
 from src.models.songs.link_song_artist import deserialize_link_song_artist
-from src.models.artists.role_type import RoleType
+from src.models.artists.role_type import role_types
+from src.models.search import refresh_search_documents
+from src.models.serializers import serializer
 
 # authentification
 from src.admin_ui.auth import authorized
 
 # utils
 from src.utils import validate_sqla_object
-from src.admin_ui.utils import get_query_args, populate_url_with_args
+from src.caching import SONGS, bump_generations
+from src.admin_ui.utils import (
+    cached_list,
+    get_query_args,
+    paginate,
+    populate_url_with_args,
+    sort_query,
+)
 
 # standard libraries
 from pathlib import Path
@@ -71,10 +80,8 @@ def filter_songs(
             | Song.original_song_artist.ilike(f"%{artist_name}%")
         )
 
-    # sorting
-    # Check if the provided sort_by is a valid attribute of SiteGeneration
-    if hasattr(Song, sort_by) and not sort_by.startswith("_"):
-        query = query.order_by(getattr(getattr(Song, sort_by), order)())
+    # sorting, on a column of Song and then on id so the order is stable
+    query = sort_query(query, Song, sort_by, order)
 
     return query
 
@@ -108,31 +115,29 @@ def songs_read():
     else:
         print("form not validated : ", form.errors)
 
-    # get filtered songs from database
-    query = db.session.query(Song)
-    query = filter_songs(query, **query_args)
-    songs = query.all()
+    def load_songs():
+        # get filtered songs from database
+        query = db.session.query(Song)
+        query = filter_songs(query, **query_args)
 
-    # get total pages
-    total_pages = len(songs) // query_args["page_size"] + 1
+        # load the current page in the database, numbered or following a cursor
+        songs, pagination = paginate(query, Song, query_args, [SONGS])
 
-    # paginate songs
-    songs = songs[
-        (query_args["page"] - 1)
-        * query_args["page_size"] : query_args["page"]
-        * query_args["page_size"]
-    ]
+        # deserizalize songs
+        serialize = serializer(Song, exclude=["content_hash"])
+        songs = [serialize(song) for song in songs]
 
-    # deserizalize songs
-    songs = [song.as_dict() for song in songs]
+        return songs, pagination
+
+    # reuse the page if it was loaded with the same args since the last song write
+    songs, pagination = cached_list("songs", query_args, [SONGS], load_songs)
 
     # render template w/ songs
     return render_template(
         "songs/read.jinja2",
         form=form,
         songs=songs,
-        current_page=query_args["page"],
-        total_pages=total_pages,
+        **pagination,
         username=session["username"],
     )
 
@@ -156,11 +161,11 @@ def song_update(id_song):
     song = Song.query.get_or_404(id_song)
 
     song_artists = {}
-    for role_type in RoleType.query.all():
-        song_artists[role_type.role_type] = [
+    for id_role_type, role_type in role_types.choices():
+        song_artists[role_type] = [
             link_song_artist
             for link_song_artist in song.artists
-            if link_song_artist.role_type.role_type == role_type.role_type
+            if link_song_artist.id_role_type == id_role_type
         ]
 
     # Initiliaze form with current song data
@@ -185,7 +190,9 @@ def song_update(id_song):
             # update song in database
             db.session.query(Song).filter_by(id=id_song).update({**form_data})
             song = (song,)
+            refresh_search_documents(db.session, song_ids=[id_song])
             db.session.commit()
+            bump_generations(SONGS)
             return redirect(f"/songs/{id_song}")
         except ValueError as e:
             args = e.args[0]
@@ -1,3 +1,36 @@
+# Standard libraries
+import base64
+import binascii
+import hashlib
+import json
+import math
+
+# flask
+from flask import abort
+from flask import current_app as app
+
+# extensions
+from src.extensions import cache
+from src.caching import get_generations
+
+# ORM
+import sqlalchemy as sa
+
+# Typing helpers
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 50
+# upper bound of the page_size query arg, a page being loaded as a whole
+MAX_PAGE_SIZE = 200
+# above this number of rows, the list pages show an estimated count unless asked for
+# the exact one, overridden by the EXACT_COUNT_THRESHOLD config variable
+EXACT_COUNT_THRESHOLD = 10000
+# seconds an exact count above the threshold is reused for the same filters
+COUNT_CACHE_TIMEOUT = 300
+# seconds a loaded list page is kept, if no write invalidates it before
+LIST_CACHE_TIMEOUT = 300
+
+
 def populate_url_with_args(url, args):
     is_first_arg = True
     for key, value in args.items():
@@ -30,9 +63,410 @@ def get_query_args(request) -> dict:
         for param, default_value in request.args.items()
     }
 
-    query_args["page"] = int(query_args["page"]) if "page" in query_args else 1
+    query_args["page"] = max(1, int(query_args["page"])) if "page" in query_args else 1
     query_args["page_size"] = (
-        int(query_args["page_size"]) if "page_size" in query_args else 50
+        min(max(1, int(query_args["page_size"])), MAX_PAGE_SIZE)
+        if "page_size" in query_args
+        else DEFAULT_PAGE_SIZE
     )
 
     return query_args
+
+
+def cached_list(name: str, query_args: dict, entities: list, load) -> tuple:
+    """
+    Load a page of a list view, or return it from the cache if it was already loaded
+    with the same query args and none of the entities it depends on was written since
+
+    Only the loaded rows and pagination variables are cached, not the rendered page,
+    which holds the user session and CSRF token.
+
+    Parameters
+    ----------
+    name : str
+        Name of the list view
+    query_args : dict
+        The query args of the page, from get_query_args
+    entities : list
+        The entities whose writes change the page, see src/caching.py
+    load : callable
+        Function loading the page from the database, returning the rows and the
+        pagination variables of the template
+
+    Returns
+    ----------
+    tuple
+        The rows of the page and the pagination variables of the template
+    """
+
+    key = json.dumps(
+        {"query_args": query_args, "generations": get_generations(*entities)},
+        sort_keys=True,
+        default=str,
+    )
+    cache_key = f"list:{name}:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    page = cache.get(cache_key)
+    if page is None:
+        page = load()
+        cache.set(cache_key, page, timeout=LIST_CACHE_TIMEOUT)
+
+    return page
+
+
+def _compile(query: Query):
+    bind = query.session.get_bind()
+    return query.statement.compile(
+        dialect=bind.dialect, compile_kwargs={"render_postcompile": True}
+    )
+
+
+def estimate_count(query: Query) -> int:
+    """
+    Estimate the number of rows of a query from the PostgreSQL planner, without running it
+
+    Returns
+    ----------
+    int
+        The estimated number of rows, None if the database isn't PostgreSQL
+    """
+
+    if query.session.get_bind().dialect.name != "postgresql":
+        return None
+
+    compiled = _compile(query)
+    plan = (
+        query.session.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params)
+        .scalar()
+    )
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_query(query: Query, exact: bool = False, entities: list = ()) -> tuple:
+    """
+    Count the rows of a query, or estimate them if there are too many to count quickly
+
+    The rows are counted up to the EXACT_COUNT_THRESHOLD config variable plus one, a
+    smaller result being counted exactly in that single statement. Above it, the
+    planner estimate is used unless exact is set or the database has no estimate. Exact
+    counts above the threshold are cached for COUNT_CACHE_TIMEOUT seconds, the next pages
+    with the same filters reusing them until one of the entities is written.
+
+    Parameters
+    ----------
+    query : SQLAlchemy query
+        The filtered query
+    exact : bool
+        Count the rows even if there are many
+    entities : list
+        The entities whose writes change the count, see src/caching.py
+
+    Returns
+    ----------
+    tuple
+        The number of rows and whether it is estimated
+    """
+
+    query = query.order_by(None)
+    threshold = int(app.config.get("EXACT_COUNT_THRESHOLD", EXACT_COUNT_THRESHOLD))
+
+    compiled = _compile(query)
+    key = json.dumps(
+        {
+            "statement": compiled.string,
+            "params": compiled.params,
+            "generations": get_generations(*entities),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    cache_key = "count:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    total = cache.get(cache_key)
+    if total is not None:
+        return total, False
+
+    if not exact:
+        # SELECT count(*) FROM (query LIMIT threshold + 1), stopping at the cap
+        bounded = query.limit(threshold + 1).count()
+        if bounded <= threshold:
+            return bounded, False
+
+        estimate = estimate_count(query)
+        if estimate is not None:
+            # the planner can't know fewer rows than were just counted
+            return max(estimate, bounded), True
+
+    total = query.count()
+    if total >= threshold:
+        cache.set(cache_key, total, timeout=COUNT_CACHE_TIMEOUT)
+
+    return total, False
+
+
+def paginate_query(
+    query: Query,
+    page: int,
+    page_size: int,
+    exact_count: bool = False,
+    entities: list = (),
+) -> tuple:
+    """
+    Load one page of a query with LIMIT / OFFSET, and count its rows
+
+    Parameters
+    ----------
+    query : SQLAlchemy query
+        The filtered and sorted query
+    page : int
+        The page to load, starting at 1
+    page_size : int
+        Number of rows per page
+    exact_count : bool
+        Count the rows even if there are too many to count quickly, see count_query
+    entities : list
+        The entities whose writes change the count, see count_query
+
+    Returns
+    ----------
+    tuple
+        The rows of the page, the total number of pages and whether it is estimated
+    """
+
+    total, estimated = count_query(query, exact=exact_count, entities=entities)
+    total_pages = max(1, math.ceil(total / page_size))
+
+    rows = query.limit(page_size).offset((page - 1) * page_size).all()
+
+    return rows, total_pages, estimated
+
+
+def sort_column(model, sort_by: str = "id") -> sa.Column:
+    """Return the column of model to sort on, id if sort_by isn't one of its columns"""
+
+    columns = sa.inspect(model).columns
+    if sort_by in columns and not sort_by.startswith("_"):
+        return getattr(model, sort_by)
+
+    return model.id
+
+
+def _ordering(column, id_column, descending: bool) -> tuple:
+    # NULLs sort last in ascending order and first in descending order, as in the
+    # (column, id) btree indexes read forward and backward
+    if column is id_column:
+        return (id_column.desc() if descending else id_column.asc(),)
+    if descending:
+        return column.desc().nulls_first(), id_column.desc()
+    return column.asc().nulls_last(), id_column.asc()
+
+
+def sort_query(query: Query, model, sort_by: str = "id", order: str = "asc") -> Query:
+    """
+    Sort a query on a column of model, ties broken by id so the order is stable
+
+    Parameters
+    ----------
+    query : SQLAlchemy query
+        The query to sort
+    model : BaseModel
+        The model whose column sort_by is
+    sort_by : str
+        The column to sort on
+    order : str
+        "asc" or "desc"
+
+    Returns
+    -------
+    SQLAlchemy query
+        The sorted query
+    """
+
+    column = sort_column(model, sort_by)
+    return query.order_by(*_ordering(column, model.id, order == "desc"))
+
+
+def encode_cursor(sort_by: str, order: str, key: list) -> str:
+    """Encode the (sort column value, id) key of a row into an opaque cursor"""
+    payload = json.dumps({"sort_by": sort_by, "order": order, "key": key})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> list:
+    """
+    Decode a cursor back to its (sort column value, id) key
+
+    Raises
+    ------
+    ValueError
+        If the cursor is malformed or was built for another sort
+    """
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        key = payload["key"]
+        value, id_value = key
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise ValueError({"cursor": f"{cursor} is not a valid cursor"})
+
+    if (payload.get("sort_by"), payload.get("order")) != (sort_by, order):
+        raise ValueError({"cursor": f"{cursor} was built for another sort"})
+
+    return [value, id_value]
+
+
+def _seek(column, id_column, key: list, forward: bool):
+    """
+    Predicate of the rows after key (forward) or before key in the ascending
+    (column, id) order, NULL values sorting after every other value
+    """
+
+    value, id_value = key
+    compare = (lambda a, b: a > b) if forward else (lambda a, b: a < b)
+
+    if value is None:
+        null_rows = sa.and_(column.is_(None), compare(id_column, id_value))
+        return null_rows if forward else sa.or_(column.is_not(None), null_rows)
+
+    predicate = compare(sa.tuple_(column, id_column), sa.tuple_(value, id_value))
+    if forward and column.nullable:
+        return sa.or_(predicate, column.is_(None))
+    return predicate
+
+
+def keyset_paginate(
+    query: Query,
+    model,
+    page_size: int,
+    sort_by: str = "id",
+    order: str = "asc",
+    after: str = None,
+    before: str = None,
+) -> tuple:
+    """
+    Load the page of a query following the after cursor, or preceding the before cursor
+
+    Rows are found by seeking in the (sort column, id) order instead of skipping the
+    previous pages with OFFSET, so every page is as fast as the first one.
+
+    Parameters
+    ----------
+    query : SQLAlchemy query
+        The filtered query, its ordering being replaced by the keyset one
+    model : BaseModel
+        The model whose column sort_by is
+    page_size : int
+        Number of rows per page
+    sort_by : str
+        The column to sort on
+    order : str
+        "asc" or "desc"
+    after : str
+        Cursor of the last row of the previous page
+    before : str
+        Cursor of the first row of the next page
+
+    Returns
+    ----------
+    tuple
+        The rows of the page, the cursor of the next page and the cursor of the previous
+        page, None when there is no such page
+
+    Raises
+    ------
+    ValueError
+        If a cursor is malformed or was built for another sort
+    """
+
+    column = sort_column(model, sort_by)
+    sort_by = column.key
+    descending = order == "desc"
+    backward = before is not None
+
+    # walking backward reads the rows in the reverse order, then flips them back
+    query = query.order_by(None).order_by(
+        *_ordering(column, model.id, descending != backward)
+    )
+    cursor = before if backward else after
+    if cursor:
+        key = decode_cursor(cursor, sort_by, order)
+        query = query.filter(
+            _seek(column, model.id, key, forward=descending == backward)
+        )
+
+    # one more row tells whether there is a page beyond this one
+    rows = query.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backward:
+        rows.reverse()
+
+    def row_cursor(row):
+        # rows of queries loading extra columns along model hold it under its class
+        if not isinstance(row, model):
+            row = row._mapping[model]
+        return encode_cursor(sort_by, order, [getattr(row, sort_by), row.id])
+
+    if not rows:
+        return rows, None, None
+    if backward:
+        return rows, row_cursor(rows[-1]), row_cursor(rows[0]) if has_more else None
+    return (
+        rows,
+        row_cursor(rows[-1]) if has_more else None,
+        row_cursor(rows[0]) if after else None,
+    )
+
+
+def paginate(query: Query, model, query_args: dict, entities: list = ()) -> tuple:
+    """
+    Load the current page of a list view, in the pagination mode asked in query_args
+
+    Keyset pagination is used when query_args has a pagination=keyset, after or before
+    arg, LIMIT / OFFSET pagination with numbered pages otherwise. The number of pages is
+    estimated for large results, unless query_args has a count=exact arg, the exact ones
+    being cached until one of the entities is written.
+
+    Returns
+    ----------
+    tuple
+        The rows of the page and the pagination variables of the template
+    """
+
+    if (
+        query_args.get("pagination") == "keyset"
+        or "after" in query_args
+        or "before" in query_args
+    ):
+        try:
+            rows, next_cursor, previous_cursor = keyset_paginate(
+                query,
+                model,
+                query_args["page_size"],
+                sort_by=query_args.get("sort_by", "id"),
+                order=query_args.get("order", "asc"),
+                after=query_args.get("after"),
+                before=query_args.get("before"),
+            )
+        except ValueError as e:
+            abort(400, e.args[0]["cursor"])
+
+        return rows, {
+            "keyset": True,
+            "next_cursor": next_cursor,
+            "previous_cursor": previous_cursor,
+        }
+
+    rows, total_pages, estimated = paginate_query(
+        query,
+        query_args["page"],
+        query_args["page_size"],
+        exact_count=query_args.get("count") == "exact",
+        entities=entities,
+    )
+    return rows, {
+        "current_page": query_args["page"],
+        "total_pages": total_pages,
+        "estimated_pages": estimated,
+    }
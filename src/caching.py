@@ -0,0 +1,347 @@
+"""Cache backend shared by the processes of a host, and the write generations.
+
+The cache type is set by the CACHE_TYPE config variable:
+- src.caching.SQLiteCache, the default: a SQLite file in CACHE_DIR, shared by every
+  process of the host, holding at most CACHE_THRESHOLD entries, the least recently used
+  ones being evicted first, and counting its hits and misses
+- RedisCache, with CACHE_REDIS_URL, to share it between hosts
+- SimpleCache, a per-process dictionary, for tests and single process runs
+
+The cached values are invalidated through the generation of the entities they depend on:
+every write starts a new generation of what it wrote, and as the generations live in the
+cache, every process sees them.
+"""
+
+# Standard libraries
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# flask
+from flask_caching.backends.base import BaseCache
+
+# extensions
+from src.extensions import cache
+
+# entities whose writes invalidate the cached values through their generation, see
+# bump_generations
+SONGS = "songs"
+SONG_ARTISTS = "song_artists"
+ARTISTS = "artists"
+ARTIST_NAMES = "artist_names"
+LINE_UPS = "line_ups"
+ANIME = "anime"
+ANIME_NAMES = "anime_names"
+# the lookup tables, see src/models/lookups.py
+LOOKUPS = "lookups"
+
+# reads whose access times and hit / miss counts are written together, at the latest
+# after ACCESS_FLUSH_INTERVAL seconds
+ACCESS_FLUSH_SIZE = 100
+ACCESS_FLUSH_INTERVAL = 5
+# entries set between two prunings, unless the estimated size crosses the threshold
+PRUNE_INTERVAL = 100
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache stored in a SQLite file, shared by every process opening it.
+
+    Reads don't write: each process keeps the access times and hit / miss counts of its
+    reads in memory and writes them in one transaction every ACCESS_FLUSH_SIZE reads or
+    ACCESS_FLUSH_INTERVAL seconds, so the least recently used order is approximate.
+    Expired and evicted entries are pruned every PRUNE_INTERVAL sets, or sooner when the
+    size estimated by the process crosses the threshold.
+
+    Parameters
+    ----------
+    path : str or Path
+        The SQLite file, created if needed.
+    threshold : int
+        The maximum number of entries, the least recently read or written ones being
+        evicted above it.
+    default_timeout : int
+        Seconds an entry is kept when set without a timeout, 0 to keep it until evicted.
+    """
+
+    def __init__(self, path, threshold: int = 10000, default_timeout: int = 300):
+        super().__init__(default_timeout=default_timeout)
+        self.path = Path(path)
+        self.threshold = threshold
+        # one connection per thread and per process, sqlite3 connections can't be shared
+        self._local = threading.local()
+        # access times and counters of the reads, and sets, not written yet
+        self._lock = threading.Lock()
+        self._reset_pending()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires REAL,
+                    accessed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_cache_accessed ON cache (accessed);
+                CREATE TABLE IF NOT EXISTS stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO stats VALUES
+                    ('hits', 0), ('misses', 0), ('evictions', 0);
+                """)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        return cls(
+            Path(config.get("CACHE_DIR") or "cache") / "cache.sqlite3",
+            threshold=int(config.get("CACHE_THRESHOLD") or 10000),
+            default_timeout=int(kwargs.get("default_timeout", 300)),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # a forked process must not reuse the connections of its parent
+        if getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return self._local.connection
+
+    def _reset_pending(self) -> None:
+        self._pid = os.getpid()
+        self._accessed = {}
+        self._counters = {"hits": 0, "misses": 0}
+        self._last_flush = time.monotonic()
+        self._sets_since_prune = 0
+        # entries in the file as last counted, plus the ones this process set since
+        self._size_estimate = 0
+
+    def _check_pid(self) -> None:
+        # a forked process must not write the pending reads of its parent again
+        if self._pid != os.getpid():
+            self._reset_pending()
+
+    def _expires(self, timeout) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout else None
+
+    # ----- Reading ----- #
+    def get_many(self, *keys):
+        now = time.time()
+        connection = self._connection()
+        placeholders = ", ".join("?" * len(keys))
+        rows = connection.execute(
+            f"SELECT key, value FROM cache WHERE key IN ({placeholders})"
+            " AND (expires IS NULL OR expires > ?)",
+            (*keys, now),
+        ).fetchall()
+        values = {key: value for key, value in rows}
+
+        self._record_reads(now, values, misses=len(keys) - len(values))
+
+        return [pickle.loads(values[key]) if key in values else None for key in keys]
+
+    def get(self, key):
+        return self.get_many(key)[0]
+
+    def has(self, key) -> bool:
+        return (
+            self._connection()
+            .execute(
+                "SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            )
+            .fetchone()
+            is not None
+        )
+
+    def _record_reads(self, now: float, keys, misses: int) -> None:
+        with self._lock:
+            self._check_pid()
+            self._accessed.update(dict.fromkeys(keys, now))
+            self._counters["hits"] += len(keys)
+            self._counters["misses"] += misses
+            due = (
+                sum(self._counters.values()) >= ACCESS_FLUSH_SIZE
+                or time.monotonic() - self._last_flush >= ACCESS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the access times and counters of the reads of this process."""
+
+        with self._lock:
+            self._check_pid()
+            accessed, counters = self._accessed, self._counters
+            self._accessed, self._counters = {}, {"hits": 0, "misses": 0}
+            self._last_flush = time.monotonic()
+        if not accessed and not any(counters.values()):
+            return
+
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "UPDATE cache SET accessed = max(accessed, ?) WHERE key = ?",
+                [(at, key) for key, at in accessed.items()],
+            )
+            self._count(connection, **counters)
+
+    # ----- Writing ----- #
+    def set(self, key, value, timeout=None) -> bool:
+        return self.set_many({key: value}, timeout) == [key]
+
+    def set_many(self, mapping, timeout=None):
+        now, expires = time.time(), self._expires(timeout)
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                [
+                    (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires, now)
+                    for key, value in mapping.items()
+                ],
+            )
+            self._maybe_prune(connection, now, len(mapping))
+        return list(mapping)
+
+    def add(self, key, value, timeout=None) -> bool:
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now)
+            )
+            added = connection.execute(
+                "INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?)",
+                (
+                    key,
+                    pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                    self._expires(timeout),
+                    now,
+                ),
+            ).rowcount
+            self._maybe_prune(connection, now, added)
+        return added == 1
+
+    def delete(self, key) -> bool:
+        connection = self._connection()
+        with connection:
+            return (
+                connection.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+                == 1
+            )
+
+    def clear(self) -> bool:
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM cache")
+        return True
+
+    # ----- Eviction and statistics ----- #
+    def _maybe_prune(self, connection, now: float, added: int) -> None:
+        with self._lock:
+            self._check_pid()
+            self._sets_since_prune += added
+            self._size_estimate += added
+            due = (
+                self._sets_since_prune >= PRUNE_INTERVAL
+                or self._size_estimate > self.threshold
+            )
+            if due:
+                self._sets_since_prune = 0
+        if due:
+            self._prune(connection, now)
+
+    def _prune(self, connection, now: float) -> None:
+        """Remove the expired entries, then the least recently used ones past threshold"""
+
+        connection.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        size = connection.execute("SELECT count(*) FROM cache").fetchone()[0]
+        evicted = connection.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM cache ORDER BY accessed LIMIT max(0, ? - ?))",
+            (size, self.threshold),
+        ).rowcount
+        self._count(connection, evictions=evicted)
+        with self._lock:
+            self._size_estimate = size - evicted
+
+    def _count(self, connection, **counters) -> None:
+        connection.executemany(
+            "UPDATE stats SET value = value + ? WHERE name = ?",
+            [(value, name) for name, value in counters.items() if value],
+        )
+
+    def stats(self) -> dict:
+        """
+        Return the hits, misses and evictions counted by every process, and the size
+
+        The reads of the other processes are only counted once they flushed them.
+        """
+
+        self.flush()
+        connection = self._connection()
+        stats = dict(connection.execute("SELECT name, value FROM stats").fetchall())
+        stats["entries"] = connection.execute("SELECT count(*) FROM cache").fetchone()[
+            0
+        ]
+        return stats
+
+
+# ----- Write generations ----- #
+def _generation_key(entity: str) -> str:
+    return f"generation:{entity}"
+
+
+def _new_generation() -> int:
+    # never reused, even after the generation was lost or evicted from the cache
+    return time.time_ns()
+
+
+def get_generations(*entities: str) -> dict:
+    """Return the current generation of each entity, starting one if it has none"""
+
+    keys = [_generation_key(entity) for entity in entities]
+    generations = dict(zip(entities, cache.get_many(*keys)))
+    for entity, key in zip(entities, keys):
+        if generations[entity] is None:
+            cache.add(key, _new_generation(), timeout=0)
+            generations[entity] = cache.get(key)
+
+    return generations
+
+
+def bump_generations(*entities: str) -> dict:
+    """
+    Start a new generation of each entity, after a write to it
+
+    The cached values depending on one of the entities are keyed by its previous
+    generation, so they aren't read anymore, in any process, and are reloaded on their
+    next request.
+
+    Parameters
+    ----------
+    *entities : str
+        The written entities, SONGS, ARTISTS, ARTIST_NAMES...
+
+    Returns
+    -------
+    dict
+        The new generation of each entity.
+    """
+
+    generations = {entity: _new_generation() for entity in entities}
+    cache.set_many(
+        {_generation_key(entity): value for entity, value in generations.items()},
+        timeout=0,
+    )
+    return generations
@@ -11,7 +11,8 @@ import random, string
 
 csrf_protect = CSRFProtect()
 db = SQLAlchemy()
-cache = Cache(config={"CACHE_TYPE": "simple"})
+# configured by the CACHE_* config variables, see src/caching.py
+cache = Cache()
 
 
 def override_url_for():
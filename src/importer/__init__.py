@@ -0,0 +1 @@
+"""The importer module, loading the raw AMQ song and artist databases into the database, and exporting them back"""
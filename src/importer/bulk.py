@@ -0,0 +1,339 @@
+"""Bulk loading of the raw AMQ databases.
+
+Instead of flushing every row to get its id back from the database, ids are assigned
+client-side, rows are staged in memory per table, and each table is written at once
+with PostgreSQL COPY (or multi-row INSERT on other drivers).
+Sequences are fixed up afterwards so the admin UI keeps inserting after the loaded rows.
+"""
+
+# Standard libraries
+import io
+import time
+
+# ORM
+import sqlalchemy as sa
+
+# models
+from src.models.anime.anime import Anime
+from src.models.anime.link_anime_names import LinkAnimeName
+from src.models.anime.link_anime_tags import LinkAnimeTag
+from src.models.anime.link_anime_genres import LinkAnimeGenre
+from src.models.artists.artist import Artist
+from src.models.artists.link_artist_names import LinkArtistName
+from src.models.artists.line_up import LineUp
+from src.models.artists.link_artist_line_up import LinkArtistLineUp
+from src.models.songs.song import Song
+from src.models.songs.link_song_artist import LinkSongArtist
+
+# mappings
+from src.importer.mappings import ROLE_TYPE_MAPPING
+from src.importer.tags import resolve_tag_and_genre_ids
+from src.importer.checkpoint import Checkpointer
+from src.importer.identity_map import ArtistIdentityMap
+from src.importer.transform import transform_anime
+from src.importer.reader import RawDataReader, ChunkProgress, PhaseTimer, chunked
+
+# Tables in foreign key order: a table is only written once every table it references is
+BULK_LOAD_ORDER = [
+    Artist,
+    LinkArtistName,
+    LineUp,
+    LinkArtistLineUp,
+    Anime,
+    LinkAnimeName,
+    LinkAnimeTag,
+    LinkAnimeGenre,
+    Song,
+    LinkSongArtist,
+]
+
+
+def _copy_value(value) -> str:
+    """Format a python value for the COPY text format."""
+    if value is None:
+        return "\\N"
+
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class BulkLoader:
+    """
+    Stage rows per table in memory and write them in large batches.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.engine.Connection
+        The connection to write with. The caller is responsible for the transaction.
+    batch_size : int
+        Number of rows sent per COPY / INSERT statement.
+    """
+
+    def __init__(self, connection, batch_size: int = 10000):
+        self.connection = connection
+        self.batch_size = batch_size
+        # COPY is only available through psycopg2, other drivers fall back to INSERT
+        self.use_copy = connection.dialect.driver == "psycopg2"
+
+        self.staged = {model: [] for model in BULK_LOAD_ORDER}
+        self.last_ids = {}
+        # table name -> (rows written, seconds spent writing)
+        self.stats = {}
+
+    def next_id(self, model) -> int:
+        """Assign the next id of a table client-side, starting after the current max id."""
+        if model not in self.last_ids:
+            self.last_ids[model] = self.connection.execute(
+                sa.select(sa.func.coalesce(sa.func.max(model.id), 0))
+            ).scalar()
+
+        self.last_ids[model] += 1
+        return self.last_ids[model]
+
+    def add(self, model, **row) -> dict:
+        """Stage a row for a table, assigning its id if the table has one."""
+        if "id" in model.__table__.columns and "id" not in row:
+            row["id"] = self.next_id(model)
+
+        self.staged[model].append(row)
+        return row
+
+    def flush(self):
+        """Write every staged row, table by table in foreign key order."""
+        for model in BULK_LOAD_ORDER:
+            if self.staged[model]:
+                self.write(model, self.staged[model])
+                self.staged[model] = []
+
+    def write(self, model, rows: list):
+        table = model.__table__
+        columns = [column.name for column in table.columns]
+
+        start = time.perf_counter()
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i : i + self.batch_size]
+            if self.use_copy:
+                self._copy(table, columns, batch)
+            else:
+                self.connection.execute(
+                    table.insert(),
+                    [{column: row.get(column) for column in columns} for row in batch],
+                )
+        elapsed = time.perf_counter() - start
+
+        total_rows, total_elapsed = self.stats.get(table.name, (0, 0.0))
+        self.stats[table.name] = (total_rows + len(rows), total_elapsed + elapsed)
+
+    def _copy(self, table, columns: list, rows: list):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(row.get(column)) for column in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        cursor = self.connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f'COPY "{table.name}" ({column_list}) FROM STDIN', buffer
+            )
+        finally:
+            cursor.close()
+
+    def fix_sequences(self):
+        """Move the id sequences after the ids assigned client-side."""
+        if self.connection.dialect.name != "postgresql":
+            return
+
+        for model in BULK_LOAD_ORDER:
+            if "id" not in model.__table__.columns:
+                continue
+            table_name = model.__tablename__
+            self.connection.execute(
+                sa.text(
+                    f"SELECT setval(pg_get_serial_sequence('\"{table_name}\"', 'id'), "
+                    f'COALESCE(MAX(id), 0) + 1, false) FROM "{table_name}"'
+                )
+            )
+
+    def report(self):
+        """Print rows/sec written per table."""
+        for table_name, (rows, elapsed) in self.stats.items():
+            rate = rows / elapsed if elapsed else 0
+            print(f"{table_name}: {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s)")
+
+
+def stage_artists(
+    loader: BulkLoader, reader: RawDataReader, chunk_size: int = 1000
+) -> ArtistIdentityMap:
+    """
+    Stage and write artists, their names, their line ups and the line up members.
+
+    Returns
+    -------
+    ArtistIdentityMap
+        The map from the raw artist ids to the new artist and line up ids
+    """
+
+    identity_map = ArtistIdentityMap()
+
+    # first pass : add artist, names and line ups
+    for count, (artist_id, artist) in enumerate(reader.iter_artists(), start=1):
+        new_artist = loader.add(
+            Artist, id_artist_type=1 if not artist["members"] else 2
+        )
+        identity_map.add_artist(artist_id, new_artist["id"])
+
+        for i, name in enumerate(artist["names"]):
+            loader.add(
+                LinkArtistName,
+                id_artist=new_artist["id"],
+                artist_name=name,
+                order=i + 1,
+            )
+
+        for line_up_id, _ in enumerate(artist["members"]):
+            new_line_up = loader.add(LineUp, id_artist=new_artist["id"])
+            identity_map.add_line_up(artist_id, line_up_id, new_line_up["id"])
+
+        if count % chunk_size == 0:
+            loader.flush()
+    loader.flush()
+
+    # second pass adding members in line ups, once every artist id is known
+    for count, (group_id, group) in enumerate(reader.iter_artists(), start=1):
+        for line_up_id, members in enumerate(group["members"]):
+            context = f"line up {line_up_id} of group {group_id}"
+            for member_id, member_line_up_id in members:
+                id_member = identity_map.resolve_artist(member_id, context)
+                if id_member is None:
+                    continue
+                loader.add(
+                    LinkArtistLineUp,
+                    id_member=id_member,
+                    id_member_line_up=identity_map.resolve_line_up(
+                        member_id, member_line_up_id, context
+                    ),
+                    id_role_type=ROLE_TYPE_MAPPING["Vocalist"],
+                    id_group=identity_map.artist_ids[group_id],
+                    id_group_line_up=identity_map.line_up_ids[(group_id, line_up_id)],
+                )
+
+        if count % chunk_size == 0:
+            loader.flush()
+    loader.flush()
+
+    return identity_map
+
+
+def stage_transformed_anime(loader: BulkLoader, record: dict):
+    """Stage the rows of an anime transformed by `transform_anime`, assigning their ids."""
+
+    id_anime = loader.add(Anime, **record["anime"])["id"]
+
+    for name in record["names"]:
+        loader.add(LinkAnimeName, id_anime=id_anime, **name)
+
+    for id_tag in record["tags"]:
+        loader.add(LinkAnimeTag, id_anime=id_anime, id_tag=id_tag)
+
+    for id_genre in record["genres"]:
+        loader.add(LinkAnimeGenre, id_anime=id_anime, id_genre=id_genre)
+
+    for song, credits in record["songs"]:
+        id_song = loader.add(Song, id_anime=id_anime, **song)["id"]
+        for credit in credits:
+            loader.add(LinkSongArtist, id_song=id_song, **credit)
+
+
+def stage_anime(
+    loader: BulkLoader,
+    anime_chunk: list,
+    identity_map: ArtistIdentityMap,
+    tag_ids: dict,
+    genre_ids: dict,
+):
+    """Stage anime with their names, tag and genre links, songs and song credits."""
+
+    for anime in anime_chunk:
+        stage_transformed_anime(
+            loader, transform_anime(anime, identity_map, tag_ids, genre_ids)
+        )
+
+
+def bulk_import(
+    connection,
+    reader: RawDataReader,
+    batch_size: int = 10000,
+    chunk_size: int = 1000,
+    checkpointer: Checkpointer = None,
+    timer: PhaseTimer = None,
+) -> dict:
+    """
+    Import the raw databases in bulk mode, in the transaction of the given connection.
+
+    Artists, then anime, are staged and written chunk_size at a time.
+
+    Parameters
+    ----------
+    checkpointer : Checkpointer
+        Commit the artists and each anime chunk with a checkpoint, skipping what the
+        previous run committed when resuming. Without it, the caller commits everything.
+    timer : PhaseTimer
+        Collects the duration of each phase, a new one by default.
+
+    Returns
+    -------
+    dict
+        The artist_id_mapping from the raw artist ids to the new artist and line up ids
+    """
+
+    timer = timer or PhaseTimer()
+    loader = BulkLoader(connection, batch_size=batch_size)
+    if checkpointer:
+        checkpointer.load(connection)
+
+    with timer.phase("tags"):
+        # tags and genres are inserted upfront in one batch each, links are staged
+        tag_ids, genre_ids = resolve_tag_and_genre_ids(connection, reader.iter_anime())
+
+    with timer.phase("artists"):
+        identity_map = checkpointer.identity_map() if checkpointer else None
+        if identity_map is None:
+            identity_map = stage_artists(loader, reader, chunk_size=chunk_size)
+            # broken line up members were skipped, raising rolls the whole import back
+            identity_map.check()
+            if checkpointer:
+                checkpointer.artists_committed(connection, identity_map)
+
+    with timer.phase("anime"):
+        anime_done = checkpointer.anime_done if checkpointer else 0
+        progress = ChunkProgress("anime")
+        for anime_chunk in chunked(reader.iter_anime(start=anime_done), chunk_size):
+            stage_anime(loader, anime_chunk, identity_map, tag_ids, genre_ids)
+            loader.flush()
+            if checkpointer:
+                # nothing broken may be committed
+                identity_map.check()
+                checkpointer.anime_committed(connection, len(anime_chunk))
+            progress.chunk_done(
+                len(anime_chunk),
+                songs=sum(len(anime["songs"]) for anime in anime_chunk),
+            )
+
+        # broken song credits were skipped, raising rolls the whole import back
+        identity_map.check()
+
+    with timer.phase("sequences"):
+        loader.fix_sequences()
+
+    loader.report()
+    if checkpointer:
+        checkpointer.done(connection)
+
+    return identity_map.as_artist_id_mapping()
@@ -0,0 +1,132 @@
+"""Checkpoints of an import committed chunk by chunk.
+
+The progress is written to the Import_Checkpoint table in the same transaction as the
+chunk it describes, so after a failure the checkpoint matches exactly what was committed
+and a rerun with --resume continues from there.
+"""
+
+# Standard libraries
+import json
+
+# ORM
+import sqlalchemy as sa
+
+# models
+from src.models.importer.import_checkpoint import ImportCheckpoint
+
+# importer
+from src.importer.identity_map import ArtistIdentityMap
+
+# The table only ever holds the checkpoint of the last run
+CHECKPOINT_ID = 1
+
+
+class Checkpointer:
+    """
+    Commit an import after its artists and after each anime chunk, recording the progress.
+
+    Parameters
+    ----------
+    commit : callable
+        Commits the transaction of the import, connection.commit or session.commit.
+    resume : bool
+        Continue from the checkpoint of the previous run instead of starting a new import.
+    """
+
+    def __init__(self, commit, resume: bool = False):
+        self.commit = commit
+        self.resume = resume
+        self.phase = "artists"
+        self.anime_done = 0
+        self.artist_id_mapping = None
+
+    def load(self, connection):
+        """
+        Read the checkpoint of the previous run when resuming, else start a new one.
+
+        Raises
+        ------
+        ValueError
+            If the previous run didn't finish and resume isn't set, as importing again
+            would duplicate what it committed
+        """
+
+        checkpoint = connection.execute(
+            sa.select(
+                ImportCheckpoint.phase,
+                ImportCheckpoint.anime_done,
+                ImportCheckpoint.artist_id_mapping,
+            ).where(ImportCheckpoint.id == CHECKPOINT_ID)
+        ).first()
+
+        if checkpoint and self.resume:
+            self.phase, self.anime_done, artist_id_mapping = checkpoint
+            if artist_id_mapping:
+                self.artist_id_mapping = json.loads(artist_id_mapping)
+            print(
+                f"Resuming the import in phase {self.phase}, "
+                f"{self.anime_done} anime already imported"
+            )
+            return
+
+        if checkpoint and checkpoint.phase != "done":
+            raise ValueError(
+                {
+                    "unfinished_import": {
+                        "phase": checkpoint.phase,
+                        "anime_done": checkpoint.anime_done,
+                    },
+                    "message": "The previous import didn't finish, rerun it with --resume",
+                }
+            )
+
+        if self.resume:
+            print("No checkpoint found, starting a new import")
+
+        connection.execute(
+            sa.delete(ImportCheckpoint).where(ImportCheckpoint.id == CHECKPOINT_ID)
+        )
+        connection.execute(
+            sa.insert(ImportCheckpoint).values(
+                id=CHECKPOINT_ID, phase=self.phase, anime_done=self.anime_done
+            )
+        )
+
+    def identity_map(self):
+        """
+        Get the identity map of the artists committed by the previous run.
+
+        Returns
+        -------
+        ArtistIdentityMap or None
+            The map, None if the artists still have to be imported
+        """
+
+        if self.artist_id_mapping is None:
+            return None
+
+        return ArtistIdentityMap.from_artist_id_mapping(self.artist_id_mapping)
+
+    def _save(self, connection, **values):
+        connection.execute(
+            sa.update(ImportCheckpoint)
+            .where(ImportCheckpoint.id == CHECKPOINT_ID)
+            .values(phase=self.phase, anime_done=self.anime_done, **values)
+        )
+        self.commit()
+
+    def artists_committed(self, connection, identity_map: ArtistIdentityMap):
+        """Commit the artists along with the identity map needed to resume the anime."""
+        self.phase = "anime"
+        self.artist_id_mapping = identity_map.as_artist_id_mapping()
+        self._save(connection, artist_id_mapping=json.dumps(self.artist_id_mapping))
+
+    def anime_committed(self, connection, anime_count: int):
+        """Commit a chunk of anime_count anime."""
+        self.anime_done += anime_count
+        self._save(connection)
+
+    def done(self, connection):
+        """Commit the end of the import, a rerun with --resume then has nothing to do."""
+        self.phase = "done"
+        self._save(connection)
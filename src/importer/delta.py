@@ -0,0 +1,398 @@
+"""Delta import of the raw AMQ databases into an already populated database.
+
+Anime are matched on ann_id and songs on their uq_song natural key. Only the entries whose
+content hash differs from the stored one are upserted with INSERT ... ON CONFLICT, and the
+columns edited by moderators (original_* names, line up assignments) are never overwritten.
+"""
+
+# Standard libraries
+from collections import Counter
+
+# ORM
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+
+# models
+from src.models.anime.anime import Anime
+from src.models.anime.link_anime_names import LinkAnimeName
+from src.models.anime.link_anime_tags import LinkAnimeTag
+from src.models.anime.link_anime_genres import LinkAnimeGenre
+from src.models.artists.artist import Artist
+from src.models.artists.link_artist_names import LinkArtistName
+from src.models.artists.line_up import LineUp
+from src.models.artists.link_artist_line_up import LinkArtistLineUp
+from src.models.songs.song import Song
+from src.models.songs.link_song_artist import LinkSongArtist
+
+# importer
+from src.importer.mappings import ROLE_TYPE_MAPPING
+from src.importer.transform import anime_names, anime_row, song_row
+from src.importer.identity_map import ArtistIdentityMap
+from src.importer.reader import RawDataReader, ChunkProgress, PhaseTimer, chunked
+from src.importer.tags import resolve_tag_and_genre_ids
+
+# Song columns refreshed from the raw data, the original_* ones belong to the moderators
+SONG_UPSERT_COLUMNS = [
+    "id_song_type",
+    "song_number",
+    "song_name",
+    "song_artist",
+    "id_song_category",
+    "song_difficulty",
+    "HQ",
+    "MQ",
+    "audio",
+    "content_hash",
+]
+
+
+def _insert(connection, model):
+    """INSERT statement of the connection dialect, supporting ON CONFLICT."""
+    if connection.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def import_new_artists(
+    connection, reader: RawDataReader, identity_map: ArtistIdentityMap
+) -> Counter:
+    """
+    Insert the artists and line ups that aren't in the identity map yet.
+
+    Existing artists are left untouched: their names and line ups belong to the moderators.
+
+    Returns
+    -------
+    Counter
+        The number of new artists and line ups
+    """
+
+    stats = Counter()
+    new_line_ups = set()
+
+    for artist_id, artist in reader.iter_artists():
+        if artist_id not in identity_map.artist_ids:
+            id_artist = connection.execute(
+                sa.insert(Artist).returning(Artist.id),
+                {"id_artist_type": 1 if not artist["members"] else 2},
+            ).scalar_one()
+            identity_map.add_artist(artist_id, id_artist)
+            if artist["names"]:
+                connection.execute(
+                    sa.insert(LinkArtistName),
+                    [
+                        {"id_artist": id_artist, "artist_name": name, "order": i + 1}
+                        for i, name in enumerate(artist["names"])
+                    ],
+                )
+            stats["new artists"] += 1
+
+        for line_up_id, _ in enumerate(artist["members"]):
+            if (artist_id, line_up_id) in identity_map.line_up_ids:
+                continue
+            id_line_up = connection.execute(
+                sa.insert(LineUp).returning(LineUp.id),
+                {"id_artist": identity_map.artist_ids[artist_id]},
+            ).scalar_one()
+            identity_map.add_line_up(artist_id, line_up_id, id_line_up)
+            new_line_ups.add((artist_id, line_up_id))
+            stats["new line ups"] += 1
+
+    # members of the new line ups, once every artist id is known
+    members_rows = []
+    for group_id, group in reader.iter_artists():
+        for line_up_id, members in enumerate(group["members"]):
+            if (group_id, line_up_id) not in new_line_ups:
+                continue
+            context = f"line up {line_up_id} of group {group_id}"
+            for member_id, member_line_up_id in members:
+                id_member = identity_map.resolve_artist(member_id, context)
+                if id_member is None:
+                    continue
+                members_rows.append(
+                    {
+                        "id_member": id_member,
+                        "id_member_line_up": identity_map.resolve_line_up(
+                            member_id, member_line_up_id, context
+                        ),
+                        "id_role_type": ROLE_TYPE_MAPPING["Vocalist"],
+                        "id_group": identity_map.artist_ids[group_id],
+                        "id_group_line_up": identity_map.line_up_ids[
+                            (group_id, line_up_id)
+                        ],
+                    }
+                )
+
+    if members_rows:
+        connection.execute(sa.insert(LinkArtistLineUp), members_rows)
+
+    return stats
+
+
+def _sync_anime_names(connection, changed_anime: list, anime_ids: dict):
+    """Add the new names of the changed anime and remove the ones that disappeared."""
+
+    incoming_names = {
+        (anime_ids[anime["annId"]], id_anime_name_type, anime_name)
+        for anime in changed_anime
+        for id_anime_name_type, anime_name in anime_names(anime)
+    }
+
+    existing_names = {}
+    for id_name, id_anime, id_anime_name_type, anime_name in connection.execute(
+        sa.select(
+            LinkAnimeName.id,
+            LinkAnimeName.id_anime,
+            LinkAnimeName.id_anime_name_type,
+            LinkAnimeName.anime_name,
+        ).where(LinkAnimeName.id_anime.in_(anime_ids.values()))
+    ):
+        existing_names[(id_anime, id_anime_name_type, anime_name)] = id_name
+
+    stale_ids = [
+        id_name
+        for name, id_name in existing_names.items()
+        if name not in incoming_names
+    ]
+    if stale_ids:
+        connection.execute(
+            sa.delete(LinkAnimeName).where(LinkAnimeName.id.in_(stale_ids))
+        )
+
+    # names already there keep their original_anime_name
+    new_names = [
+        {"id_anime": id_anime, "id_anime_name_type": id_type, "anime_name": anime_name}
+        for id_anime, id_type, anime_name in sorted(
+            incoming_names - existing_names.keys()
+        )
+    ]
+    if new_names:
+        connection.execute(
+            _insert(connection, LinkAnimeName).on_conflict_do_nothing(), new_names
+        )
+
+
+def _replace_anime_links(connection, model, rows: list, anime_ids: dict):
+    """Replace the tag / genre links of the changed anime."""
+
+    connection.execute(sa.delete(model).where(model.id_anime.in_(anime_ids.values())))
+    if rows:
+        connection.execute(sa.insert(model), rows)
+
+
+def delta_import_anime_chunk(
+    connection,
+    anime_chunk: list,
+    anime_hashes: dict,
+    identity_map: ArtistIdentityMap,
+    tag_ids: dict,
+    genre_ids: dict,
+    stats: Counter,
+):
+    """Upsert the anime of a chunk whose content hash changed, with their songs."""
+
+    changed_anime = []
+    for anime in anime_chunk:
+        row = anime_row(anime)
+        existing = anime_hashes.get(anime["annId"])
+        if existing and existing[1] == row["content_hash"]:
+            stats["unchanged anime"] += 1
+            continue
+        stats["updated anime" if existing else "new anime"] += 1
+        changed_anime.append((anime, row))
+
+    if not changed_anime:
+        return
+
+    # upsert anime on ann_id
+    statement = _insert(connection, Anime)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Anime.ann_id],
+        set_={
+            "id_anime_type": statement.excluded.id_anime_type,
+            "anime_vintage": statement.excluded.anime_vintage,
+            "content_hash": statement.excluded.content_hash,
+        },
+    ).returning(Anime.id, Anime.ann_id)
+    anime_ids = {
+        ann_id: id_anime
+        for id_anime, ann_id in connection.execute(
+            statement, [row for _, row in changed_anime]
+        )
+    }
+    for anime, row in changed_anime:
+        anime_hashes[anime["annId"]] = (anime_ids[anime["annId"]], row["content_hash"])
+
+    changed_anime = [anime for anime, _ in changed_anime]
+    _sync_anime_names(connection, changed_anime, anime_ids)
+    _replace_anime_links(
+        connection,
+        LinkAnimeTag,
+        [
+            {"id_anime": anime_ids[anime["annId"]], "id_tag": tag_ids[tag]}
+            for anime in changed_anime
+            for tag in anime.get("tags", [])
+        ],
+        anime_ids,
+    )
+    _replace_anime_links(
+        connection,
+        LinkAnimeGenre,
+        [
+            {"id_anime": anime_ids[anime["annId"]], "id_genre": genre_ids[genre]}
+            for anime in changed_anime
+            for genre in anime.get("genres", [])
+        ],
+        anime_ids,
+    )
+
+    # match songs on the uq_song natural key
+    existing_songs = {}
+    for id_song, *natural_key, song_hash in connection.execute(
+        sa.select(
+            Song.id,
+            Song.id_anime,
+            Song.id_song_type,
+            Song.song_number,
+            Song.song_name,
+            Song.song_artist,
+            Song.content_hash,
+        ).where(Song.id_anime.in_(anime_ids.values()))
+    ):
+        existing_songs[tuple(natural_key)] = (id_song, song_hash)
+
+    updated_songs, new_songs = [], []
+    for anime in changed_anime:
+        for song in anime["songs"]:
+            row = {"id_anime": anime_ids[anime["annId"]], **song_row(song)}
+            natural_key = (
+                row["id_anime"],
+                row["id_song_type"],
+                row["song_number"],
+                row["song_name"],
+                row["song_artist"],
+            )
+            existing = existing_songs.get(natural_key)
+            if existing and existing[1] == row["content_hash"]:
+                stats["unchanged songs"] += 1
+            elif existing:
+                row["id"] = existing[0]
+                updated_songs.append((row, song, anime))
+            else:
+                new_songs.append((row, song, anime))
+
+    song_ids = []
+    if updated_songs:
+        # matched in python so that songs without song_number (NULL in uq_song) match too
+        statement = _insert(connection, Song)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Song.id],
+            set_={column: statement.excluded[column] for column in SONG_UPSERT_COLUMNS},
+        )
+        connection.execute(statement, [row for row, _, _ in updated_songs])
+        song_ids += [(row["id"], song, anime) for row, song, anime in updated_songs]
+        stats["updated songs"] += len(updated_songs)
+
+    if new_songs:
+        statement = _insert(connection, Song)
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                Song.id_anime,
+                Song.id_song_type,
+                Song.song_number,
+                Song.song_name,
+                Song.song_artist,
+            ],
+            set_={column: statement.excluded[column] for column in SONG_UPSERT_COLUMNS},
+        ).returning(Song.id, sort_by_parameter_order=True)
+        inserted_ids = connection.execute(
+            statement, [row for row, _, _ in new_songs]
+        ).scalars()
+        song_ids += [
+            (id_song, song, anime)
+            for id_song, (_, song, anime) in zip(inserted_ids, new_songs)
+        ]
+        stats["new songs"] += len(new_songs)
+
+    # add the missing credits, existing ones keep their line up assignment
+    credits = [
+        {"id_song": id_song, **credit}
+        for id_song, song, anime in song_ids
+        for credit in identity_map.resolve_song_credits(
+            song, f"song {song['songName']} of anime {anime['annId']}"
+        )
+    ]
+    if credits:
+        connection.execute(
+            _insert(connection, LinkSongArtist).on_conflict_do_nothing(), credits
+        )
+
+
+def delta_import(
+    connection,
+    reader: RawDataReader,
+    artist_id_mapping: dict,
+    chunk_size: int = 1000,
+    timer: PhaseTimer = None,
+) -> dict:
+    """
+    Import only what changed since the previous import, in the connection transaction.
+
+    Songs and credits missing from the raw data are kept, moderators may have added them.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.engine.Connection
+        The connection to write with.
+    reader : RawDataReader
+        The raw databases to import.
+    artist_id_mapping : dict
+        The artist_id_mapping.json saved by the previous import.
+    chunk_size : int
+        Number of anime compared and upserted at a time.
+    timer : PhaseTimer
+        Collects the duration of each phase, a new one by default.
+
+    Returns
+    -------
+    dict
+        The updated artist_id_mapping
+    """
+
+    timer = timer or PhaseTimer()
+    identity_map = ArtistIdentityMap.from_artist_id_mapping(artist_id_mapping)
+
+    with timer.phase("artists"):
+        stats = import_new_artists(connection, reader, identity_map)
+        identity_map.check()
+
+    with timer.phase("tags"):
+        tag_ids, genre_ids = resolve_tag_and_genre_ids(connection, reader.iter_anime())
+
+    with timer.phase("anime"):
+        anime_hashes = {
+            ann_id: (id_anime, anime_hash)
+            for id_anime, ann_id, anime_hash in connection.execute(
+                sa.select(Anime.id, Anime.ann_id, Anime.content_hash)
+            )
+        }
+
+        progress = ChunkProgress("anime")
+        for anime_chunk in chunked(reader.iter_anime(), chunk_size):
+            delta_import_anime_chunk(
+                connection,
+                anime_chunk,
+                anime_hashes,
+                identity_map,
+                tag_ids,
+                genre_ids,
+                stats,
+            )
+            progress.chunk_done(len(anime_chunk))
+
+        identity_map.check()
+
+    for key, count in stats.items():
+        print(f"{key}: {count}")
+
+    return identity_map.as_artist_id_mapping()
@@ -0,0 +1,397 @@
+"""Export of the moderated database back to the raw AMQ format read by the importer.
+
+song_database.json and artist_database.json are rebuilt with the raw schema, plus the
+original_* names kept by the moderation. The anime and artists are read with server-side
+cursors, their related rows loaded with one query per batch, and the JSON is produced
+entry by entry, so memory doesn't grow with the database.
+
+The artist ids of the export are the database ids, and a line up index is the position of
+the line up among the line ups of its artist, the order they were imported in.
+"""
+
+# Standard libraries
+from pathlib import Path
+import json
+import time
+import zlib
+
+# ORM
+import sqlalchemy as sa
+
+# models
+from src.models.anime.anime import Anime
+from src.models.anime.genre import Genre
+from src.models.anime.link_anime_genres import LinkAnimeGenre
+from src.models.anime.link_anime_names import LinkAnimeName
+from src.models.anime.link_anime_tags import LinkAnimeTag
+from src.models.anime.tag import Tag
+from src.models.artists.artist import Artist
+from src.models.artists.line_up import LineUp
+from src.models.artists.link_artist_line_up import LinkArtistLineUp
+from src.models.artists.link_artist_names import LinkArtistName
+from src.models.songs.link_song_artist import LinkSongArtist
+from src.models.songs.song import Song
+
+# importer
+from src.importer.mappings import (
+    ANIME_TYPE_MAPPING,
+    ANIME_NAME_TYPE_MAPPING,
+    SONG_CATEGORY_MAPPING,
+    ROLE_TYPE_MAPPING,
+)
+
+ANIME_TYPES = {id_: name for name, id_ in ANIME_TYPE_MAPPING.items() if name}
+SONG_CATEGORIES = {id_: name for name, id_ in SONG_CATEGORY_MAPPING.items() if name}
+# raw name fields of each anime name type, the alternative names being altNames
+ANIME_NAME_FIELDS = {
+    "Expand": "animeExpandName",
+    "Japanese": "animeJPName",
+    "English": "animeENName",
+}
+# raw credit fields of each role, the last two aren't read by the importer
+ROLE_TYPE_FIELDS = {
+    ROLE_TYPE_MAPPING["Vocalist"]: "artist_ids",
+    ROLE_TYPE_MAPPING["Composer"]: "composer_ids",
+    ROLE_TYPE_MAPPING["Arranger"]: "arranger_ids",
+    ROLE_TYPE_MAPPING["Backing vocals"]: "backing_vocals_ids",
+    ROLE_TYPE_MAPPING["Performer"]: "performer_ids",
+}
+RAW_ROLE_FIELDS = ["artist_ids", "composer_ids", "arranger_ids"]
+
+
+def _stream_batches(connection, statement, batch_size: int):
+    """Yield the rows of a statement batch_size at a time, from a server-side cursor."""
+    result = connection.execute(statement.execution_options(yield_per=batch_size))
+    yield from result.partitions()
+
+
+def _group_by_first(rows) -> dict:
+    """Group rows on their first column, keeping the order of the rows."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[0], []).append(row)
+
+    return groups
+
+
+def _line_up_indices(connection) -> dict:
+    """Map every line up id to its index among the line ups of its artist."""
+    indices = {}
+    current_artist, index = None, 0
+    for id_line_up, id_artist in connection.execute(
+        sa.select(LineUp.id, LineUp.id_artist).order_by(LineUp.id_artist, LineUp.id)
+    ):
+        if id_artist != current_artist:
+            current_artist, index = id_artist, 0
+        indices[id_line_up] = index
+        index += 1
+
+    return indices
+
+
+def _song_difficulty(song_difficulty: str):
+    # the raw difficulty is a number, stored as a string
+    try:
+        return float(song_difficulty)
+    except (TypeError, ValueError):
+        return song_difficulty
+
+
+def _anime_entry(
+    anime, names: list, tags: list, genres: list, songs: list, credits: dict, indices
+) -> dict:
+    """Rebuild the raw entry of an anime from its rows."""
+
+    names_by_type = _group_by_first(
+        (id_anime_name_type, anime_name, original_anime_name)
+        for _, id_anime_name_type, anime_name, original_anime_name in names
+    )
+
+    entry = {"annId": anime.ann_id}
+    for name_type, field in ANIME_NAME_FIELDS.items():
+        typed_names = names_by_type.get(ANIME_NAME_TYPE_MAPPING[name_type], [])
+        entry[field] = typed_names[0][1] if typed_names else None
+        entry[f"original_{field}"] = typed_names[0][2] if typed_names else None
+    alt_names = names_by_type.get(ANIME_NAME_TYPE_MAPPING["Alternative"], [])
+    entry["altNames"] = [name for _, name, _ in alt_names]
+    entry["original_altNames"] = [original_name for _, _, original_name in alt_names]
+
+    entry["animeType"] = ANIME_TYPES.get(anime.id_anime_type)
+    entry["animeVintage"] = anime.anime_vintage
+    entry["tags"] = [tag for _, tag in tags]
+    entry["genres"] = [genre for _, genre in genres]
+
+    entry["songs"] = []
+    for song in songs:
+        song_entry = {
+            "songType": song.id_song_type,
+            "songNumber": song.song_number or 0,
+            "songName": song.song_name,
+            "original_songName": song.original_song_name,
+            "songArtist": song.song_artist,
+            "original_songArtist": song.original_song_artist,
+            "songComposer": song.song_composer,
+            "original_songComposer": song.original_song_composer,
+            "songArranger": song.song_arranger,
+            "original_songArranger": song.original_song_arranger,
+            "songCategory": SONG_CATEGORIES.get(song.id_song_category),
+            "songDifficulty": _song_difficulty(song.song_difficulty),
+            "links": {
+                key: link
+                for key, link in (
+                    ("HQ", song.HQ),
+                    ("MQ", song.MQ),
+                    ("audio", song.audio),
+                )
+                if link
+            },
+            **{field: [] for field in RAW_ROLE_FIELDS},
+        }
+        for _, id_artist, id_artist_line_up, id_role_type in credits.get(song.id, []):
+            song_entry.setdefault(ROLE_TYPE_FIELDS[id_role_type], []).append(
+                [str(id_artist), indices.get(id_artist_line_up, -1)]
+            )
+        entry["songs"].append(song_entry)
+
+    return entry
+
+
+def iter_song_database(connection, batch_size: int = 1000):
+    """
+    Yield the raw entries of every anime, ordered by id.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.engine.Connection
+        The connection to read with.
+    batch_size : int
+        Number of anime read, and whose related rows are loaded, at a time.
+    """
+
+    indices = _line_up_indices(connection)
+
+    for batch in _stream_batches(
+        connection,
+        sa.select(
+            Anime.id, Anime.ann_id, Anime.id_anime_type, Anime.anime_vintage
+        ).order_by(Anime.id),
+        batch_size,
+    ):
+        anime_ids = [anime.id for anime in batch]
+
+        names = _group_by_first(
+            connection.execute(
+                sa.select(
+                    LinkAnimeName.id_anime,
+                    LinkAnimeName.id_anime_name_type,
+                    LinkAnimeName.anime_name,
+                    LinkAnimeName.original_anime_name,
+                )
+                .where(LinkAnimeName.id_anime.in_(anime_ids))
+                .order_by(LinkAnimeName.id)
+            )
+        )
+        tags = _group_by_first(
+            connection.execute(
+                sa.select(LinkAnimeTag.id_anime, Tag.tag)
+                .join(Tag, Tag.id == LinkAnimeTag.id_tag)
+                .where(LinkAnimeTag.id_anime.in_(anime_ids))
+                .order_by(LinkAnimeTag.id_anime, Tag.id)
+            )
+        )
+        genres = _group_by_first(
+            connection.execute(
+                sa.select(LinkAnimeGenre.id_anime, Genre.genre)
+                .join(Genre, Genre.id == LinkAnimeGenre.id_genre)
+                .where(LinkAnimeGenre.id_anime.in_(anime_ids))
+                .order_by(LinkAnimeGenre.id_anime, Genre.id)
+            )
+        )
+        songs = {}
+        for song in connection.execute(
+            sa.select(Song.__table__)
+            .where(Song.id_anime.in_(anime_ids))
+            .order_by(Song.id)
+        ):
+            songs.setdefault(song.id_anime, []).append(song)
+        credits = _group_by_first(
+            connection.execute(
+                sa.select(
+                    LinkSongArtist.id_song,
+                    LinkSongArtist.id_artist,
+                    LinkSongArtist.id_artist_line_up,
+                    LinkSongArtist.id_role_type,
+                )
+                .join(Song, Song.id == LinkSongArtist.id_song)
+                .where(Song.id_anime.in_(anime_ids))
+                .order_by(LinkSongArtist.id)
+            )
+        )
+
+        for anime in batch:
+            yield _anime_entry(
+                anime,
+                names.get(anime.id, []),
+                tags.get(anime.id, []),
+                genres.get(anime.id, []),
+                songs.get(anime.id, []),
+                credits,
+                indices,
+            )
+
+
+def iter_artist_database(connection, batch_size: int = 1000):
+    """Yield the (artist id, raw artist entry) of every artist, ordered by id."""
+
+    indices = _line_up_indices(connection)
+
+    for batch in _stream_batches(
+        connection, sa.select(Artist.id).order_by(Artist.id), batch_size
+    ):
+        artist_ids = [artist.id for artist in batch]
+
+        names = _group_by_first(
+            connection.execute(
+                sa.select(
+                    LinkArtistName.id_artist,
+                    LinkArtistName.artist_name,
+                    LinkArtistName.original_artist_name,
+                )
+                .where(LinkArtistName.id_artist.in_(artist_ids))
+                .order_by(LinkArtistName.id_artist, LinkArtistName.order)
+            )
+        )
+        line_ups = _group_by_first(
+            connection.execute(
+                sa.select(LineUp.id_artist, LineUp.id)
+                .where(LineUp.id_artist.in_(artist_ids))
+                .order_by(LineUp.id)
+            )
+        )
+        members = _group_by_first(
+            connection.execute(
+                sa.select(
+                    LinkArtistLineUp.id_group_line_up,
+                    LinkArtistLineUp.id_member,
+                    LinkArtistLineUp.id_member_line_up,
+                )
+                .where(LinkArtistLineUp.id_group.in_(artist_ids))
+                .order_by(LinkArtistLineUp.id)
+            )
+        )
+
+        for (id_artist,) in batch:
+            artist_names = names.get(id_artist, [])
+            yield str(id_artist), {
+                "names": [name for _, name, _ in artist_names],
+                "original_names": [original for _, _, original in artist_names],
+                "members": [
+                    [
+                        [str(id_member), indices.get(id_member_line_up, -1)]
+                        for _, id_member, id_member_line_up in members.get(
+                            id_line_up, []
+                        )
+                    ]
+                    for _, id_line_up in line_ups.get(id_artist, [])
+                ],
+            }
+
+
+def iter_json_array(entries, buffer_size: int = 1 << 16):
+    """Yield a JSON array of the entries as text chunks of about buffer_size."""
+    buffer, size = ["["], 1
+    for i, entry in enumerate(entries):
+        chunk = ("," if i else "") + json.dumps(entry, ensure_ascii=False)
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    buffer.append("]")
+    yield "".join(buffer)
+
+
+def iter_json_object(items, buffer_size: int = 1 << 16):
+    """Yield a JSON object of the (key, value) items as text chunks of about buffer_size."""
+    buffer, size = ["{"], 1
+    for i, (key, value) in enumerate(items):
+        chunk = (
+            ("," if i else "")
+            + json.dumps(key, ensure_ascii=False)
+            + ":"
+            + json.dumps(value, ensure_ascii=False)
+        )
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    buffer.append("}")
+    yield "".join(buffer)
+
+
+def encode_chunks(chunks, compress: bool = False):
+    """Encode text chunks to utf-8, gzip compressed on the fly if compress is set."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode("utf-8")
+        return
+
+    # wbits=31 writes the gzip header and trailer
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_export(connection, database: str, compress: bool = False, batch_size=1000):
+    """
+    Yield the bytes of an exported raw database.
+
+    Parameters
+    ----------
+    database : str
+        "song_database" or "artist_database".
+    """
+
+    if database == "song_database":
+        chunks = iter_json_array(iter_song_database(connection, batch_size))
+    elif database == "artist_database":
+        chunks = iter_json_object(iter_artist_database(connection, batch_size))
+    else:
+        raise ValueError({"database": f"Unknown raw database {database}"})
+
+    return encode_chunks(chunks, compress=compress)
+
+
+def export_raw_data(
+    connection, output_path: Path, compress: bool = False, batch_size: int = 1000
+) -> list:
+    """
+    Write song_database.json and artist_database.json (.json.gz if compress) to output_path.
+
+    Returns
+    -------
+    list of Path
+        The written files
+    """
+
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+    for database in ("song_database", "artist_database"):
+        start = time.perf_counter()
+        path = output_path / f"{database}.json{'.gz' if compress else ''}"
+        with open(path, "wb") as f:
+            for data in iter_export(connection, database, compress, batch_size):
+                f.write(data)
+        print(
+            f"{database}: exported to {path} in {time.perf_counter() - start:.2f}s "
+            f"({path.stat().st_size / 1e6:.1f} MB)"
+        )
+        paths.append(path)
+
+    return paths
@@ -0,0 +1,17 @@
+"""Content hashes of the raw entries, stored on Anime and Song for the delta import."""
+
+# Standard libraries
+import hashlib
+import json
+
+
+def content_hash(entry: dict) -> str:
+    """
+    Hash a raw anime or song entry, independently of its key order.
+
+    An anime hash covers its songs too, so an unchanged anime hash means nothing in the
+    entry changed.
+    """
+
+    serialized = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
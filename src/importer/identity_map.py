@@ -0,0 +1,197 @@
+"""Identity map from the raw artist ids to the ids of the imported rows.
+
+Every artist and line up id is known as soon as it is inserted (or staged), so references
+from line ups and songs are resolved in memory instead of querying the Artist table.
+"""
+
+from collections import Counter
+
+# mappings
+from src.importer.mappings import ROLE_TYPE_MAPPING
+
+
+class ArtistIdentityMap:
+    """
+    Map the raw artist ids and line up indices to the new artist and line up ids.
+
+    References that can't be resolved don't raise on the spot: they are collected so that
+    `check` reports all of them at once.
+    """
+
+    def __init__(self):
+        # raw artist id -> new artist id
+        self.artist_ids = {}
+        # (raw artist id, line up index) -> new line up id
+        self.line_up_ids = {}
+        # raw artist id -> every new artist id registered for it
+        self.ambiguous_artist_ids = {}
+        self.problems = []
+
+    def add_artist(self, artist_id: str, new_artist_id: int):
+        if artist_id in self.artist_ids:
+            self.ambiguous_artist_ids.setdefault(
+                artist_id, {self.artist_ids[artist_id]}
+            ).add(new_artist_id)
+        self.artist_ids[artist_id] = new_artist_id
+
+    def add_line_up(self, artist_id: str, line_up_id: int, new_line_up_id: int):
+        self.line_up_ids[(artist_id, line_up_id)] = new_line_up_id
+
+    def resolve_artist(self, artist_id: str, context: str):
+        """
+        Get the new id of a raw artist id.
+
+        Parameters
+        ----------
+        artist_id : str
+            The raw artist id.
+        context : str
+            Where the reference comes from, for the validation report.
+
+        Returns
+        -------
+        int or None
+            The new artist id, None if it is missing or ambiguous
+        """
+
+        if artist_id in self.ambiguous_artist_ids:
+            self.problems.append(
+                {
+                    "problem": "ambiguous artist",
+                    "artist_id": artist_id,
+                    "candidates": sorted(self.ambiguous_artist_ids[artist_id]),
+                    "context": context,
+                }
+            )
+            return None
+
+        if artist_id not in self.artist_ids:
+            self.problems.append(
+                {
+                    "problem": "missing artist",
+                    "artist_id": artist_id,
+                    "context": context,
+                }
+            )
+            return None
+
+        return self.artist_ids[artist_id]
+
+    def resolve_line_up(self, artist_id: str, line_up_id: int, context: str):
+        """
+        Get the new id of a raw line up index, -1 meaning no specific line up.
+
+        Returns
+        -------
+        int or None
+            The new line up id, None if there is no line up or it is missing
+        """
+
+        if line_up_id == -1:
+            return None
+
+        if (artist_id, line_up_id) not in self.line_up_ids:
+            self.problems.append(
+                {
+                    "problem": "missing line up",
+                    "artist_id": artist_id,
+                    "line_up_id": line_up_id,
+                    "context": context,
+                }
+            )
+            return None
+
+        return self.line_up_ids[(artist_id, line_up_id)]
+
+    def resolve_song_credits(self, song: dict, context: str) -> list:
+        """
+        Resolve the vocalists, composers and arrangers of a raw song.
+
+        Returns
+        -------
+        list of dict
+            The Link_Song_Artist columns of each credit whose artist could be resolved
+        """
+
+        credits = []
+
+        for artist_id, line_up_id in song["artist_ids"]:
+            id_artist = self.resolve_artist(artist_id, context)
+            if id_artist is not None:
+                credits.append(
+                    {
+                        "id_artist": id_artist,
+                        "id_artist_line_up": self.resolve_line_up(
+                            artist_id, line_up_id, context
+                        ),
+                        "id_role_type": ROLE_TYPE_MAPPING["Vocalist"],
+                    }
+                )
+
+        for role_type, key in (
+            ("Composer", "composer_ids"),
+            ("Arranger", "arranger_ids"),
+        ):
+            for artist_id, _ in song[key]:
+                id_artist = self.resolve_artist(artist_id, context)
+                if id_artist is not None:
+                    credits.append(
+                        {
+                            "id_artist": id_artist,
+                            "id_artist_line_up": None,
+                            "id_role_type": ROLE_TYPE_MAPPING[role_type],
+                        }
+                    )
+
+        return credits
+
+    def check(self):
+        """
+        Print the validation report of every unresolved reference.
+
+        Raises
+        ------
+        ValueError
+            If any reference could not be resolved, so the import is rolled back
+        """
+
+        if not self.problems:
+            return
+
+        print(f"{len(self.problems)} unresolved references:")
+        for problem, count in Counter(p["problem"] for p in self.problems).items():
+            print(f"  {problem}: {count}")
+        for problem in self.problems:
+            print(f"  {problem}")
+
+        raise ValueError({"unresolved_references": self.problems})
+
+    @classmethod
+    def from_artist_id_mapping(cls, artist_id_mapping: dict) -> "ArtistIdentityMap":
+        """Load the map saved in artist_id_mapping.json by a previous import."""
+
+        identity_map = cls()
+        for artist_id, mapping in artist_id_mapping.items():
+            identity_map.add_artist(artist_id, mapping["new_artist_id"])
+            # json turned the line up indices into strings
+            for line_up_id, line_up in mapping.get("line_ups", {}).items():
+                identity_map.add_line_up(
+                    artist_id, int(line_up_id), line_up["new_line_up_id"]
+                )
+
+        return identity_map
+
+    def as_artist_id_mapping(self) -> dict:
+        """Export the map in the artist_id_mapping.json format."""
+
+        artist_id_mapping = {
+            artist_id: {"old_artist_id": artist_id, "new_artist_id": new_artist_id}
+            for artist_id, new_artist_id in self.artist_ids.items()
+        }
+        for (artist_id, line_up_id), new_line_up_id in self.line_up_ids.items():
+            artist_id_mapping[artist_id].setdefault("line_ups", {})[line_up_id] = {
+                "old_line_up_id": line_up_id,
+                "new_line_up_id": new_line_up_id,
+            }
+
+        return artist_id_mapping
@@ -0,0 +1,25 @@
+"""Mappings from the values found in the raw AMQ dumps to the ids of the lookup tables."""
+
+ANIME_TYPE_MAPPING = {"TV": 1, "movie": 2, "OVA": 3, "ONA": 4, "special": 5, None: None}
+ANIME_NAME_TYPE_MAPPING = {
+    "Expand": 1,
+    "Japanese": 2,
+    "English": 3,
+    "Alternative": 4,
+}
+# the raw songType already is the id of the Song_Type row
+SONG_TYPE_MAPPING = {"Opening": 1, "Ending": 2, "Insert Song": 3}
+SONG_CATEGORY_MAPPING = {
+    "Standard": 1,
+    "Chanting": 2,
+    "Character": 3,
+    "Instrumental": 4,
+    None: None,
+}
+ROLE_TYPE_MAPPING = {
+    "Vocalist": 1,
+    "Backing vocals": 2,
+    "Performer": 3,
+    "Composer": 4,
+    "Arranger": 5,
+}
@@ -0,0 +1,173 @@
+"""Parallel import pipeline of the raw AMQ databases.
+
+The work is split in three stages:
+- the main process reads the raw anime entries and cuts them in chunks,
+- a pool of worker processes transforms each chunk into rows without ids, resolving the
+  song credits against a read-only copy of the artist identity map,
+- the main process is the single writer: it assigns ids client-side and writes the rows
+  in batches with the BulkLoader, so the database only ever sees one writing connection.
+
+Artists are still staged by the writer first, as every song credit depends on their ids.
+"""
+
+# Standard libraries
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+# importer
+from src.importer.bulk import BulkLoader, stage_artists, stage_transformed_anime
+from src.importer.checkpoint import Checkpointer
+from src.importer.identity_map import ArtistIdentityMap
+from src.importer.reader import RawDataReader, ChunkProgress, PhaseTimer, chunked
+from src.importer.tags import resolve_tag_and_genre_ids
+from src.importer.transform import transform_anime
+
+# Read-only state of a worker process, set once by _init_worker
+_worker_state = {}
+
+
+def _init_worker(identity_map: ArtistIdentityMap, tag_ids: dict, genre_ids: dict):
+    """Keep the identity map and the tag and genre ids for every chunk of the worker."""
+    _worker_state["identity_map"] = identity_map
+    _worker_state["tag_ids"] = tag_ids
+    _worker_state["genre_ids"] = genre_ids
+
+
+def _transform_chunk(anime_chunk: list) -> tuple:
+    """
+    Transform a chunk of anime in a worker process.
+
+    Returns
+    -------
+    tuple
+        The transformed anime, and the unresolved references found in the chunk
+    """
+
+    identity_map = _worker_state["identity_map"]
+    records = [
+        transform_anime(
+            anime,
+            identity_map,
+            _worker_state["tag_ids"],
+            _worker_state["genre_ids"],
+        )
+        for anime in anime_chunk
+    ]
+
+    # the problems are reported by the writer, only keep those of the next chunk
+    problems, identity_map.problems = identity_map.problems, []
+
+    return records, problems
+
+
+def _ordered_results(executor, function, chunks, max_pending: int):
+    """
+    Yield the results of function over chunks in order, with at most max_pending chunks
+    submitted at once so the reader doesn't get ahead of the writer.
+    """
+
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(function, chunk))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def pipeline_import(
+    connection,
+    reader: RawDataReader,
+    workers: int = None,
+    batch_size: int = 10000,
+    chunk_size: int = 1000,
+    checkpointer: Checkpointer = None,
+    timer: PhaseTimer = None,
+) -> dict:
+    """
+    Import the raw databases with parallel transformation and a single bulk writer, in the
+    transaction of the given connection.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.engine.Connection
+        The connection of the single writer.
+    reader : RawDataReader
+        The raw databases.
+    workers : int
+        Number of worker processes transforming anime, the number of CPUs by default.
+    batch_size : int
+        Number of rows sent per COPY / INSERT statement.
+    chunk_size : int
+        Number of anime sent to a worker at once.
+    checkpointer : Checkpointer
+        Commit the artists and each anime chunk with a checkpoint, skipping what the
+        previous run committed when resuming. Without it, the caller commits everything.
+    timer : PhaseTimer
+        Collects the duration of each phase, a new one by default.
+
+    Returns
+    -------
+    dict
+        The artist_id_mapping from the raw artist ids to the new artist and line up ids
+    """
+
+    workers = workers or os.cpu_count() or 1
+    timer = timer or PhaseTimer()
+    loader = BulkLoader(connection, batch_size=batch_size)
+    if checkpointer:
+        checkpointer.load(connection)
+
+    with timer.phase("tags"):
+        tag_ids, genre_ids = resolve_tag_and_genre_ids(connection, reader.iter_anime())
+
+    with timer.phase("artists"):
+        identity_map = checkpointer.identity_map() if checkpointer else None
+        if identity_map is None:
+            identity_map = stage_artists(loader, reader, chunk_size=chunk_size)
+            # broken line up members were skipped, raising rolls the whole import back
+            identity_map.check()
+            if checkpointer:
+                checkpointer.artists_committed(connection, identity_map)
+
+    with timer.phase("anime"):
+        anime_done = checkpointer.anime_done if checkpointer else 0
+        progress = ChunkProgress("anime")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(identity_map, tag_ids, genre_ids),
+        ) as executor:
+            for records, problems in _ordered_results(
+                executor,
+                _transform_chunk,
+                chunked(reader.iter_anime(start=anime_done), chunk_size),
+                max_pending=2 * workers,
+            ):
+                for record in records:
+                    stage_transformed_anime(loader, record)
+                loader.flush()
+
+                identity_map.problems.extend(problems)
+                if checkpointer:
+                    # nothing broken may be committed
+                    identity_map.check()
+                    checkpointer.anime_committed(connection, len(records))
+                progress.chunk_done(
+                    len(records),
+                    songs=sum(len(record["songs"]) for record in records),
+                )
+
+        # broken song credits were skipped, raising rolls the whole import back
+        identity_map.check()
+
+    with timer.phase("sequences"):
+        loader.fix_sequences()
+
+    loader.report()
+    if checkpointer:
+        checkpointer.done(connection)
+
+    return identity_map.as_artist_id_mapping()
@@ -0,0 +1,142 @@
+"""Readers for the raw song and artist databases.
+
+In streaming mode the entries are parsed one at a time, either from a JSON-lines variant of
+the raw files or incrementally with ijson, so memory doesn't grow with the dataset.
+"""
+
+# Standard libraries
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+import json
+import time
+
+# Optional incremental JSON parser, only needed to stream the plain .json files
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+class RawDataReader:
+    """
+    Iterate over the raw databases found in raw_data_path.
+
+    The JSON-lines variants are used when present:
+    - song_database.jsonl : one anime entry per line
+    - artist_database.jsonl : one [artist_id, artist] pair per line
+
+    Parameters
+    ----------
+    raw_data_path : Path
+        The folder holding the raw databases.
+    stream : bool
+        Parse entries one at a time instead of loading whole files with json.load.
+    """
+
+    def __init__(self, raw_data_path: Path, stream: bool = False):
+        self.raw_data_path = Path(raw_data_path)
+        self.stream = stream
+        self._song_database = None
+        self._artist_database = None
+
+        if stream and ijson is None and not self._has_json_lines():
+            raise ValueError(
+                "Streaming needs ijson installed or the .jsonl variants of the raw databases"
+            )
+
+    def _has_json_lines(self) -> bool:
+        return (self.raw_data_path / "song_database.jsonl").exists() and (
+            self.raw_data_path / "artist_database.jsonl"
+        ).exists()
+
+    def _iter_json_lines(self, file_name: str, start: int = 0):
+        with open(self.raw_data_path / file_name, "r", encoding="utf-8") as f:
+            lines = (line for line in f if line.strip())
+            # skipped lines aren't parsed
+            for line in islice(lines, start, None):
+                yield json.loads(line)
+
+    def iter_anime(self, start: int = 0):
+        """Yield the anime entries of the song database, from the start-th one."""
+        if not self.stream:
+            if self._song_database is None:
+                with open(
+                    self.raw_data_path / "song_database.json", "r", encoding="utf-8"
+                ) as f:
+                    self._song_database = json.load(f)
+            yield from islice(self._song_database, start, None)
+
+        elif (self.raw_data_path / "song_database.jsonl").exists():
+            yield from self._iter_json_lines("song_database.jsonl", start)
+
+        else:
+            with open(self.raw_data_path / "song_database.json", "rb") as f:
+                yield from islice(ijson.items(f, "item", use_float=True), start, None)
+
+    def iter_artists(self):
+        """Yield the (artist_id, artist) pairs of the artist database."""
+        if not self.stream:
+            if self._artist_database is None:
+                with open(
+                    self.raw_data_path / "artist_database.json", "r", encoding="utf-8"
+                ) as f:
+                    self._artist_database = json.load(f)
+            yield from self._artist_database.items()
+
+        elif (self.raw_data_path / "artist_database.jsonl").exists():
+            for artist_id, artist in self._iter_json_lines("artist_database.jsonl"):
+                yield artist_id, artist
+
+        else:
+            with open(self.raw_data_path / "artist_database.json", "rb") as f:
+                yield from ijson.kvitems(f, "", use_float=True)
+
+
+def chunked(iterable, chunk_size: int):
+    """Yield lists of at most chunk_size consecutive items of an iterable."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+class ChunkProgress:
+    """Print a progress and throughput line after each imported chunk."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.total = 0
+        self.start = time.perf_counter()
+        self.chunk_start = self.start
+
+    def chunk_done(self, size: int, songs: int = 0):
+        now = time.perf_counter()
+        elapsed = now - self.chunk_start
+        self.total += size
+
+        rate = size / elapsed if elapsed else 0
+        overall_rate = self.total / (now - self.start) if now > self.start else 0
+        songs_rate = f", {songs / elapsed:.0f} songs/s" if songs and elapsed else ""
+        print(
+            f"{self.label}: {self.total} done, chunk of {size} in {elapsed:.2f}s "
+            f"({rate:.0f} {self.label}/s{songs_rate}, {overall_rate:.0f} {self.label}/s overall)"
+        )
+
+        self.chunk_start = now
+
+
+class PhaseTimer:
+    """Time the phases of an import, printing each duration as the phase ends."""
+
+    def __init__(self):
+        # phase name -> seconds spent in it
+        self.durations = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+
+        self.durations[name] = self.durations.get(name, 0.0) + elapsed
+        print(f"{name} phase: {elapsed:.2f}s")
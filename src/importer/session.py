@@ -0,0 +1,284 @@
+"""Row by row import of the raw AMQ databases through the ORM session.
+
+This is the default import of populate_database.py. The bulk and pipeline imports are
+faster, this one goes through the same ORM models as the admin UI.
+"""
+
+# ORM
+from sqlalchemy import insert
+
+# models
+from src.models.anime.anime import Anime
+from src.models.anime.link_anime_names import LinkAnimeName
+from src.models.anime.link_anime_tags import LinkAnimeTag
+from src.models.anime.link_anime_genres import LinkAnimeGenre
+from src.models.artists.artist import Artist
+from src.models.artists.link_artist_names import LinkArtistName
+from src.models.artists.line_up import LineUp
+from src.models.artists.link_artist_line_up import LinkArtistLineUp
+from src.models.songs.song import Song
+from src.models.songs.link_song_artist import LinkSongArtist
+
+# importer
+from src.importer.mappings import (
+    ANIME_TYPE_MAPPING,
+    ANIME_NAME_TYPE_MAPPING,
+    SONG_CATEGORY_MAPPING,
+    ROLE_TYPE_MAPPING,
+)
+from src.importer.checkpoint import Checkpointer
+from src.importer.tags import resolve_tag_and_genre_ids
+from src.importer.identity_map import ArtistIdentityMap
+from src.importer.hashing import content_hash
+from src.importer.reader import RawDataReader, ChunkProgress, PhaseTimer, chunked
+
+
+def import_artists_with_session(session, reader: RawDataReader) -> ArtistIdentityMap:
+    """
+    Import artists, their names, their line ups and the line up members row by row.
+
+    Returns
+    -------
+    ArtistIdentityMap
+        The map from the raw artist ids to the new artist and line up ids
+    """
+
+    identity_map = ArtistIdentityMap()
+
+    # first pass : add artist, names and line ups
+    for artist_id, artist in reader.iter_artists():
+        new_artist = Artist(
+            **{
+                "id_artist_type": 1 if not artist["members"] else 2,
+            }
+        )
+        session.add(new_artist)
+        session.flush()
+        identity_map.add_artist(artist_id, new_artist.id)
+
+        for i, name in enumerate(artist["names"]):
+            new_artist_name = LinkArtistName(
+                **{
+                    "id_artist": new_artist.id,
+                    "artist_name": name,
+                    "order": i + 1,
+                }
+            )
+            session.add(new_artist_name)
+            session.flush()
+
+        for line_up_id, _ in enumerate(artist["members"]):
+            new_line_up = LineUp(**{"id_artist": new_artist.id})
+            session.add(new_line_up)
+            session.flush()
+            identity_map.add_line_up(artist_id, line_up_id, new_line_up.id)
+
+        session.expunge_all()
+
+    # second pass adding members in line ups, once every artist id is known
+    for group_id, group in reader.iter_artists():
+        for line_up_id, members in enumerate(group["members"]):
+            context = f"line up {line_up_id} of group {group_id}"
+            for member_id, member_line_up_id in members:
+                id_member = identity_map.resolve_artist(member_id, context)
+                if id_member is None:
+                    continue
+                new_link_artist_line_up = LinkArtistLineUp(
+                    **{
+                        "id_member": id_member,
+                        "id_member_line_up": identity_map.resolve_line_up(
+                            member_id, member_line_up_id, context
+                        ),
+                        "id_role_type": ROLE_TYPE_MAPPING["Vocalist"],
+                        "id_group": identity_map.artist_ids[group_id],
+                        "id_group_line_up": identity_map.line_up_ids[
+                            (group_id, line_up_id)
+                        ],
+                    }
+                )
+                session.add(new_link_artist_line_up)
+                session.flush()
+
+        session.expunge_all()
+
+    return identity_map
+
+
+def import_anime_chunk_with_session(
+    session,
+    anime_chunk: list,
+    identity_map: ArtistIdentityMap,
+    tag_ids: dict,
+    genre_ids: dict,
+):
+    """Import a chunk of anime with their names, tags, genres, songs and song credits."""
+
+    # tag and genre links are inserted in bulk after the loop
+    link_anime_tags = []
+    link_anime_genres = []
+
+    for anime in anime_chunk:
+        new_anime = Anime(
+            **{
+                "ann_id": anime["annId"],
+                "id_anime_type": ANIME_TYPE_MAPPING[anime.get("animeType", None)],
+                "anime_vintage": anime.get("animeVintage", None),
+                "content_hash": content_hash(anime),
+            }
+        )
+        session.add(new_anime)
+        # Flush the session to get the id assigned by the database
+        session.flush()
+
+        new_anime_name = LinkAnimeName(
+            **{
+                "id_anime": new_anime.id,
+                "id_anime_name_type": ANIME_NAME_TYPE_MAPPING["Expand"],
+                "anime_name": anime["animeExpandName"],
+            }
+        )
+        session.add(new_anime_name)
+
+        if anime.get("animeJPName", None):
+            new_anime_name = LinkAnimeName(
+                **{
+                    "id_anime": new_anime.id,
+                    "id_anime_name_type": ANIME_NAME_TYPE_MAPPING["Japanese"],
+                    "anime_name": anime["animeJPName"],
+                }
+            )
+            session.add(new_anime_name)
+
+        if anime.get("animeENName", None):
+            new_anime_name = LinkAnimeName(
+                **{
+                    "id_anime": new_anime.id,
+                    "id_anime_name_type": ANIME_NAME_TYPE_MAPPING["English"],
+                    "anime_name": anime["animeENName"],
+                }
+            )
+            session.add(new_anime_name)
+
+        for alt_name in anime.get("altNames", []):
+            new_anime_name = LinkAnimeName(
+                **{
+                    "id_anime": new_anime.id,
+                    "id_anime_name_type": ANIME_NAME_TYPE_MAPPING["Alternative"],
+                    "anime_name": alt_name,
+                }
+            )
+            session.add(new_anime_name)
+
+        session.flush()
+
+        for tag in anime.get("tags", []):
+            link_anime_tags.append({"id_anime": new_anime.id, "id_tag": tag_ids[tag]})
+
+        for genre in anime.get("genres", []):
+            link_anime_genres.append(
+                {"id_anime": new_anime.id, "id_genre": genre_ids[genre]}
+            )
+
+        for song in anime["songs"]:
+            new_song = Song(
+                **{
+                    "id_anime": new_anime.id,
+                    "id_song_type": song["songType"],
+                    "song_number": song["songNumber"] or None,
+                    "song_name": song["songName"],
+                    "song_artist": song["songArtist"],
+                    "id_song_category": SONG_CATEGORY_MAPPING[
+                        song.get("songCategory", None)
+                    ],
+                    "song_difficulty": song.get("songDifficulty", None),
+                    "HQ": song["links"].get("HQ", None),
+                    "MQ": song["links"].get("MQ", None),
+                    "audio": song["links"].get("audio", None),
+                    "content_hash": content_hash(song),
+                }
+            )
+
+            session.add(new_song)
+            session.flush()
+
+            context = f"song {song['songName']} of anime {anime['annId']}"
+            for credit in identity_map.resolve_song_credits(song, context):
+                session.add(LinkSongArtist(id_song=new_song.id, **credit))
+
+            session.flush()
+
+    if link_anime_tags:
+        session.execute(insert(LinkAnimeTag), link_anime_tags)
+    if link_anime_genres:
+        session.execute(insert(LinkAnimeGenre), link_anime_genres)
+
+    # the chunk is written, release its objects so memory doesn't grow with the dataset
+    session.expunge_all()
+
+
+def import_with_session(
+    session,
+    reader: RawDataReader,
+    chunk_size: int = 1000,
+    checkpointer: Checkpointer = None,
+    timer: PhaseTimer = None,
+) -> dict:
+    """
+    Import the raw databases row by row through the ORM session, chunk_size anime at a time.
+
+    Parameters
+    ----------
+    checkpointer : Checkpointer
+        Commit the artists and each anime chunk with a checkpoint, skipping what the
+        previous run committed when resuming. Without it, the caller commits everything.
+    timer : PhaseTimer
+        Collects the duration of each phase, a new one by default.
+
+    Returns
+    -------
+    dict
+        The artist_id_mapping from the raw artist ids to the new artist and line up ids
+    """
+
+    timer = timer or PhaseTimer()
+    if checkpointer:
+        checkpointer.load(session.connection())
+
+    with timer.phase("tags"):
+        # tags and genres are resolved upfront in one batch each
+        tag_ids, genre_ids = resolve_tag_and_genre_ids(
+            session.connection(), reader.iter_anime()
+        )
+
+    with timer.phase("artists"):
+        identity_map = checkpointer.identity_map() if checkpointer else None
+        if identity_map is None:
+            identity_map = import_artists_with_session(session, reader)
+            # broken line up members were skipped, raising rolls the whole import back
+            identity_map.check()
+            if checkpointer:
+                checkpointer.artists_committed(session.connection(), identity_map)
+
+    with timer.phase("anime"):
+        anime_done = checkpointer.anime_done if checkpointer else 0
+        progress = ChunkProgress("anime")
+        for anime_chunk in chunked(reader.iter_anime(start=anime_done), chunk_size):
+            import_anime_chunk_with_session(
+                session, anime_chunk, identity_map, tag_ids, genre_ids
+            )
+            if checkpointer:
+                # nothing broken may be committed
+                identity_map.check()
+                checkpointer.anime_committed(session.connection(), len(anime_chunk))
+            progress.chunk_done(
+                len(anime_chunk),
+                songs=sum(len(anime["songs"]) for anime in anime_chunk),
+            )
+
+        # report every broken song credit at once, before anything is committed
+        identity_map.check()
+
+    if checkpointer:
+        checkpointer.done(session.connection())
+
+    return identity_map.as_artist_id_mapping()
@@ -0,0 +1,82 @@
+"""Tag and genre resolution for the importer.
+
+Existing tags and genres are preloaded into dictionaries and every new value found in the
+song database is inserted in a single batch, so the anime loop never queries them.
+"""
+
+# ORM
+import sqlalchemy as sa
+
+# models
+from src.models.anime.tag import Tag
+from src.models.anime.genre import Genre
+
+
+def collect_tags_and_genres(song_database) -> tuple:
+    """
+    Collect the distinct tags and genres of the song database in one pass.
+
+    Returns
+    -------
+    tuple of sets
+        The distinct tags and the distinct genres
+    """
+
+    tags, genres = set(), set()
+    for anime in song_database:
+        tags.update(anime.get("tags", []))
+        genres.update(anime.get("genres", []))
+
+    return tags, genres
+
+
+def resolve_lookup_ids(connection, model, column_name: str, values: set) -> dict:
+    """
+    Map each value to its id in a lookup table, inserting the missing ones in one batch.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.engine.Connection
+        The connection to query and insert with.
+    model : DeclarativeBase
+        The lookup model (Tag, Genre).
+    column_name : str
+        The column holding the value (tag, genre).
+    values : set
+        The values that need an id.
+
+    Returns
+    -------
+    dict
+        The id of each value, including the ones already in the table
+    """
+
+    column = getattr(model, column_name)
+    ids = {value: id for id, value in connection.execute(sa.select(model.id, column))}
+
+    new_values = sorted(values - ids.keys())
+    if new_values:
+        inserted = connection.execute(
+            sa.insert(model).returning(model.id, column),
+            [{column_name: value} for value in new_values],
+        )
+        ids.update({value: id for id, value in inserted})
+
+    return ids
+
+
+def resolve_tag_and_genre_ids(connection, song_database) -> tuple:
+    """
+    Resolve the id of every tag and genre of the song database.
+
+    Returns
+    -------
+    tuple of dicts
+        The tag ids and the genre ids, keyed by tag / genre
+    """
+
+    tags, genres = collect_tags_and_genres(song_database)
+    tag_ids = resolve_lookup_ids(connection, Tag, "tag", tags)
+    genre_ids = resolve_lookup_ids(connection, Genre, "genre", genres)
+
+    return tag_ids, genre_ids
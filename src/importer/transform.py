@@ -0,0 +1,85 @@
+"""Transformation of the raw anime entries into the rows of the database tables.
+
+The transformation doesn't touch the database: ids are assigned by whoever writes the rows,
+so it can run in worker processes as well as in the writer itself.
+"""
+
+# importer
+from src.importer.mappings import (
+    ANIME_TYPE_MAPPING,
+    ANIME_NAME_TYPE_MAPPING,
+    SONG_CATEGORY_MAPPING,
+)
+from src.importer.hashing import content_hash
+from src.importer.identity_map import ArtistIdentityMap
+
+
+def anime_names(anime: dict) -> list:
+    """List the (id_anime_name_type, anime_name) of a raw anime entry."""
+    names = [(ANIME_NAME_TYPE_MAPPING["Expand"], anime["animeExpandName"])]
+    if anime.get("animeJPName", None):
+        names.append((ANIME_NAME_TYPE_MAPPING["Japanese"], anime["animeJPName"]))
+    if anime.get("animeENName", None):
+        names.append((ANIME_NAME_TYPE_MAPPING["English"], anime["animeENName"]))
+    for alt_name in anime.get("altNames", []):
+        names.append((ANIME_NAME_TYPE_MAPPING["Alternative"], alt_name))
+
+    return names
+
+
+def anime_row(anime: dict) -> dict:
+    """Build the Anime columns of a raw anime entry."""
+    return {
+        "ann_id": anime["annId"],
+        "id_anime_type": ANIME_TYPE_MAPPING[anime.get("animeType", None)],
+        "anime_vintage": anime.get("animeVintage", None),
+        "content_hash": content_hash(anime),
+    }
+
+
+def song_row(song: dict) -> dict:
+    """Build the Song columns of a raw song entry, except id_anime."""
+    return {
+        "id_song_type": song["songType"],
+        "song_number": song["songNumber"] or None,
+        "song_name": song["songName"],
+        "song_artist": song["songArtist"],
+        "id_song_category": SONG_CATEGORY_MAPPING[song.get("songCategory", None)],
+        "song_difficulty": song.get("songDifficulty", None),
+        "HQ": song["links"].get("HQ", None),
+        "MQ": song["links"].get("MQ", None),
+        "audio": song["links"].get("audio", None),
+        "content_hash": content_hash(song),
+    }
+
+
+def transform_anime(
+    anime: dict, identity_map: ArtistIdentityMap, tag_ids: dict, genre_ids: dict
+) -> dict:
+    """
+    Transform a raw anime entry into the rows of every table it populates, without ids.
+
+    Returns
+    -------
+    dict
+        - anime : the Anime columns
+        - names : the Link_Anime_Name columns of each name
+        - tags / genres : the id of each tag / genre
+        - songs : (Song columns, Link_Song_Artist columns of each credit) of each song
+    """
+
+    songs = []
+    for song in anime["songs"]:
+        context = f"song {song['songName']} of anime {anime['annId']}"
+        songs.append((song_row(song), identity_map.resolve_song_credits(song, context)))
+
+    return {
+        "anime": anime_row(anime),
+        "names": [
+            {"id_anime_name_type": id_anime_name_type, "anime_name": anime_name}
+            for id_anime_name_type, anime_name in anime_names(anime)
+        ],
+        "tags": [tag_ids[tag] for tag in anime.get("tags", [])],
+        "genres": [genre_ids[genre] for genre in anime.get("genres", [])],
+        "songs": songs,
+    }
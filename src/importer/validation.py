@@ -0,0 +1,216 @@
+"""Pre-flight validation of the raw AMQ databases.
+
+Every reference of the raw files is checked before any database work starts, against
+compact in-memory indexes of the artists (raw artist id -> number of line ups) and anime,
+so a broken dump is rejected in seconds instead of failing halfway through an import.
+"""
+
+# Standard libraries
+from collections import Counter
+import time
+
+# importer
+from src.importer.mappings import (
+    ANIME_TYPE_MAPPING,
+    SONG_TYPE_MAPPING,
+    SONG_CATEGORY_MAPPING,
+)
+from src.importer.reader import RawDataReader
+
+ANIME_FIELDS = ["annId", "animeExpandName", "songs"]
+SONG_FIELDS = [
+    "songType",
+    "songNumber",
+    "songName",
+    "songArtist",
+    "links",
+    "artist_ids",
+    "composer_ids",
+    "arranger_ids",
+]
+CREDIT_FIELDS = {
+    "Vocalist": "artist_ids",
+    "Composer": "composer_ids",
+    "Arranger": "arranger_ids",
+}
+
+
+class RawDataValidator:
+    """Collect the problems of the raw databases, in the format of ArtistIdentityMap."""
+
+    def __init__(self):
+        # raw artist id -> number of line ups
+        self.line_up_counts = {}
+        self.problems = []
+
+    def problem(self, problem: str, context: str, **details):
+        self.problems.append({"problem": problem, **details, "context": context})
+
+    def check_reference(
+        self, artist_id, line_up_id, context: str, check_line_up: bool = True
+    ):
+        """Check an [artist id, line up index] reference, -1 meaning no line up."""
+
+        if artist_id not in self.line_up_counts:
+            self.problem("missing artist", context, artist_id=artist_id)
+            return
+
+        if check_line_up and line_up_id != -1:
+            if not isinstance(line_up_id, int) or not (
+                0 <= line_up_id < self.line_up_counts[artist_id]
+            ):
+                self.problem(
+                    "missing line up",
+                    context,
+                    artist_id=artist_id,
+                    line_up_id=line_up_id,
+                )
+
+    def index_artists(self, reader: RawDataReader):
+        for artist_id, artist in reader.iter_artists():
+            context = f"artist {artist_id}"
+            if artist_id in self.line_up_counts:
+                self.problem("duplicate artist", context, artist_id=artist_id)
+            if not artist.get("names"):
+                self.problem("artist without name", context, artist_id=artist_id)
+            self.line_up_counts[artist_id] = len(artist.get("members", []))
+
+    def check_artists(self, reader: RawDataReader):
+        for group_id, group in reader.iter_artists():
+            for line_up_id, members in enumerate(group.get("members", [])):
+                context = f"line up {line_up_id} of group {group_id}"
+                seen = set()
+                for member_id, member_line_up_id in members:
+                    if member_id in seen:
+                        self.problem("duplicate member", context, artist_id=member_id)
+                    seen.add(member_id)
+                    self.check_reference(member_id, member_line_up_id, context)
+
+    def check_song(self, song: dict, context: str):
+        missing = [field for field in SONG_FIELDS if field not in song]
+        if missing:
+            self.problem("missing fields", context, fields=missing)
+            return
+
+        if song["songType"] not in SONG_TYPE_MAPPING.values():
+            self.problem("unknown songType", context, value=song["songType"])
+        if song.get("songCategory", None) not in SONG_CATEGORY_MAPPING:
+            self.problem("unknown songCategory", context, value=song["songCategory"])
+
+        for role_type, field in CREDIT_FIELDS.items():
+            seen = set()
+            for artist_id, line_up_id in song[field]:
+                if artist_id in seen:
+                    self.problem(
+                        "duplicate credit", context, artist_id=artist_id, role=role_type
+                    )
+                seen.add(artist_id)
+                # only the vocalists are credited with a line up
+                self.check_reference(
+                    artist_id,
+                    line_up_id,
+                    context,
+                    check_line_up=role_type == "Vocalist",
+                )
+
+    def check_anime(self, reader: RawDataReader) -> Counter:
+        counts = Counter()
+        ann_ids = set()
+
+        for anime in reader.iter_anime():
+            counts["anime"] += 1
+            context = f"anime {anime.get('annId')}"
+
+            missing = [field for field in ANIME_FIELDS if field not in anime]
+            if missing:
+                self.problem("missing fields", context, fields=missing)
+                continue
+
+            if anime["annId"] in ann_ids:
+                self.problem("duplicate anime", context, ann_id=anime["annId"])
+            ann_ids.add(anime["annId"])
+
+            if anime.get("animeType", None) not in ANIME_TYPE_MAPPING:
+                self.problem("unknown animeType", context, value=anime["animeType"])
+
+            # the natural key of uq_song, songNumber 0 being imported as NULL
+            song_keys = set()
+            for song in anime["songs"]:
+                counts["songs"] += 1
+                song_context = f"song {song.get('songName')} of anime {anime['annId']}"
+                self.check_song(song, song_context)
+
+                key = (
+                    song.get("songType"),
+                    song.get("songNumber") or None,
+                    song.get("songName"),
+                    song.get("songArtist"),
+                )
+                if key in song_keys:
+                    self.problem("duplicate song", song_context)
+                song_keys.add(key)
+
+        return counts
+
+
+def validate_raw_data(reader: RawDataReader) -> dict:
+    """
+    Check every reference of the raw databases, without touching the database.
+
+    Parameters
+    ----------
+    reader : RawDataReader
+        The raw databases to check.
+
+    Returns
+    -------
+    dict
+        The machine readable report:
+        - valid : whether no problem was found
+        - counts : number of anime, songs and artists read
+        - summary : number of problems per kind of problem
+        - problems : every problem, with its kind, the ids involved and its context
+        - seconds : duration of the validation
+    """
+
+    start = time.perf_counter()
+    validator = RawDataValidator()
+
+    validator.index_artists(reader)
+    validator.check_artists(reader)
+    counts = validator.check_anime(reader)
+    counts["artists"] = len(validator.line_up_counts)
+
+    return {
+        "valid": not validator.problems,
+        "counts": dict(counts),
+        "summary": dict(Counter(problem["problem"] for problem in validator.problems)),
+        "problems": validator.problems,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def check_raw_data(reader: RawDataReader) -> dict:
+    """
+    Validate the raw databases and print the report before an import.
+
+    Raises
+    ------
+    ValueError
+        If any problem was found, so the import doesn't start
+    """
+
+    report = validate_raw_data(reader)
+    counts = ", ".join(f"{count} {name}" for name, count in report["counts"].items())
+    print(f"Raw databases validated in {report['seconds']:.2f}s: {counts}")
+
+    if report["valid"]:
+        return report
+
+    print(f"{len(report['problems'])} problems in the raw databases:")
+    for problem, count in report["summary"].items():
+        print(f"  {problem}: {count}")
+    for problem in report["problems"]:
+        print(f"  {problem}")
+
+    raise ValueError({"invalid_raw_data": report})
@@ -0,0 +1,133 @@
+"""JSON encoding of the responses, with orjson when it is installed.
+
+Every JSON response goes through the app's JSON provider, whether it is built by jsonify
+or by returning a dict or a list from a view. JSONProvider keeps the behavior of Flask's
+provider (sorted keys, the same fallbacks for the types json can't encode) but encodes
+with orjson, straight to bytes, when it is installed and the JSON_ENCODER config
+variable doesn't ask for the standard json module. Both encoders give the same bytes.
+
+stream_json sends a large array one chunk of items at a time, each item being encoded
+when it is reached, so the encoded array is never held whole in memory.
+"""
+
+# Standard libraries
+from itertools import islice
+from typing import Iterable
+
+# flask
+from flask import Response, current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+# Optional fast JSON encoder, the standard json module is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# encoders of the JSON_ENCODER config variable
+JSON_ENCODERS = ["orjson", "json"]
+# items of a streamed array encoded and sent together
+STREAM_CHUNK_SIZE = 100
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider encoding with orjson, or with the standard json module.
+
+    Parameters
+    ----------
+    app : Flask
+        The app using the provider.
+    encoder : str
+        "orjson" to use it when it is installed, "json" for the standard json module.
+    """
+
+    def __init__(self, app, encoder: str = "orjson"):
+        super().__init__(app)
+        if encoder not in JSON_ENCODERS:
+            raise ValueError(
+                {"JSON_ENCODER": f"{encoder} is not one of {', '.join(JSON_ENCODERS)}"}
+            )
+        self.use_orjson = encoder == "orjson" and orjson is not None
+
+    def _options(self) -> int:
+        # dates and dataclasses go through default, as with json, instead of the
+        # encodings of orjson
+        options = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj) -> bytes:
+        """Encode obj to UTF-8 JSON bytes."""
+
+        if self.use_orjson:
+            return orjson.dumps(obj, default=self.default, option=self._options())
+        # orjson writes the non ASCII characters as UTF-8, not as \u escapes
+        return (
+            super()
+            .dumps(obj, separators=(",", ":"), ensure_ascii=False)
+            .encode("utf-8")
+        )
+
+    def dumps(self, obj, **kwargs) -> str:
+        # specific json.dumps arguments, such as indent, are only known by json
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs) -> Response:
+        # the pretty printed responses of the debug mode are left to json
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if pretty:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def stream_json(items: Iterable, chunk_size: int = STREAM_CHUNK_SIZE) -> Response:
+    """
+    Stream a JSON array, encoding its items chunk_size at a time as they are produced.
+
+    The request context is kept while streaming, so the items can be a generator
+    reading the database.
+
+    Parameters
+    ----------
+    items : iterable
+        The items of the array, encoded with the app's JSON provider.
+    chunk_size : int
+        The number of items encoded and sent together.
+
+    Returns
+    -------
+    Response
+        The streamed application/json response.
+    """
+
+    provider = current_app.json
+    encode = (
+        provider.dumps_bytes
+        if isinstance(provider, JSONProvider)
+        else lambda item: provider.dumps(item).encode("utf-8")
+    )
+
+    def generate():
+        items_iterator = iter(items)
+        separator = b"["
+        while chunk := list(islice(items_iterator, chunk_size)):
+            yield separator + b",".join(map(encode, chunk))
+            separator = b","
+        yield b"[]" if separator == b"[" else b"]"
+
+    return Response(stream_with_context(generate()), mimetype=provider.mimetype)
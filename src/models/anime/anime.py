@@ -1,12 +1,13 @@
 # ORM
 import sqlalchemy as sa
-from sqlalchemy.orm import validates, relationship, backref
+from sqlalchemy.orm import validates, relationship, backref, deferred
 
 # Extensions
-from src.models.extensions import BaseModel
+from src.models.extensions import BaseModel, SearchDocument, search_index
 
 # Related models
 from src.models.anime.anime_type import AnimeType, retrieve_anime_type_choices
+from src.models.anime.anime_name_type import retrieve_anime_name_type_choices
 
 # Forms
 from flask_wtf import FlaskForm
@@ -31,6 +32,24 @@ class Anime(BaseModel):
 
     anime_vintage = sa.Column(sa.String(200), nullable=True)
 
+    # copy of its Expand name, to list and sort the anime, see
+    # src/models/display_names.py
+    display_name = sa.Column(sa.String, nullable=True)
+
+    # hash of the raw entry, used by the delta import to skip unchanged anime
+    content_hash = sa.Column(sa.String(64), nullable=True)
+
+    # full-text search document of the anime, see src/models/search.py
+    search_document = deferred(sa.Column(SearchDocument, nullable=True))
+
+    __table_args__ = (
+        # keyset pagination of the anime list on its sort columns
+        sa.Index("ix_anime_anime_vintage_id", "anime_vintage", "id"),
+        sa.Index("ix_anime_id_anime_type_id", "id_anime_type", "id"),
+        sa.Index("ix_anime_display_name_id", "display_name", "id"),
+        search_index("anime"),
+    )
+
 
 # ModelForm to imitate the ORM model & FlaskForm to use the automatic CRSF protection
 class AnimeUpdateForm(ModelForm, FlaskForm):
@@ -48,7 +67,7 @@ class AnimeUpdateForm(ModelForm, FlaskForm):
 
     class Meta:
         model = Anime
-        exclude = []
+        exclude = ["content_hash", "display_name", "search_document"]
         include = ["id_anime_type"]
 
     def __init__(self, *args, **kwargs):
@@ -58,9 +77,18 @@ class AnimeUpdateForm(ModelForm, FlaskForm):
 
 class AnimeSearchForm(FlaskForm):
     anime_name = StringField("Anime Name")
+    id_anime_name_type = SelectField(label="Name Type", choices=[])
     page = IntegerField(label="Page", default=1)
     page_size = IntegerField(label="Page size", default=50)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the query args are strings, and no name type searches every name
+        self.id_anime_name_type.choices = [("", "Any")] + [
+            (str(id_anime_name_type), anime_name_type)
+            for id_anime_name_type, anime_name_type in retrieve_anime_name_type_choices()
+        ]
+
 
 def deserialize_anime(
     anime,
@@ -68,7 +96,7 @@ def deserialize_anime(
     extend_genres: bool = False,
     extend_tags: bool = False,
 ):
-    deserialized_anime = anime.as_dict()
+    deserialized_anime = anime.as_dict(exclude=["content_hash"])
 
     deserialized_anime["anime_type"] = (
         anime.anime_type.anime_type if anime.anime_type else None
@@ -2,6 +2,7 @@
 import sqlalchemy as sa
 from sqlalchemy.orm import validates
 from src.models.extensions import BaseModel
+from src.models.lookups import LookupTable
 
 # Forms
 from flask_wtf import FlaskForm
@@ -18,9 +19,12 @@ class AnimeNameType(BaseModel):
     anime_name_type = sa.Column(sa.String, nullable=False, unique=True)
 
 
+anime_name_types = LookupTable(AnimeNameType, "anime_name_type")
+
+
 def retrieve_anime_name_type_choices() -> List[Tuple]:
     """
-    Function to retrieve all anime_name_type from the database.
+    Function to retrieve all anime_name_type from the lookup registry.
 
     Returns
     -------
@@ -28,11 +32,4 @@ def retrieve_anime_name_type_choices() -> List[Tuple]:
         List of tuples containing the anime_name_type name and its ID.
     """
 
-    retrieve_anime_name_type_choices = AnimeNameType.query.all()
-
-    choices = [
-        (anime_name_type.id, anime_name_type.anime_name_type)
-        for anime_name_type in retrieve_anime_name_type_choices
-    ]
-
-    return choices
+    return anime_name_types.choices()
@@ -2,6 +2,7 @@
 import sqlalchemy as sa
 from sqlalchemy.orm import validates
 from src.models.extensions import BaseModel
+from src.models.lookups import LookupTable
 
 # Forms
 from flask_wtf import FlaskForm
@@ -18,9 +19,12 @@ class AnimeType(BaseModel):
     anime_type = sa.Column(sa.String, nullable=False, unique=True)
 
 
+anime_types = LookupTable(AnimeType, "anime_type")
+
+
 def retrieve_anime_type_choices() -> List[Tuple]:
     """
-    Function to retrieve all anime_type from the database.
+    Function to retrieve all anime_type from the lookup registry.
 
     Returns
     -------
@@ -28,11 +32,4 @@ def retrieve_anime_type_choices() -> List[Tuple]:
         List of tuples containing the anime_type name and its ID.
     """
 
-    retrieve_anime_type_choices = AnimeType.query.all()
-
-    choices = [
-        (anime_type.id, anime_type.anime_type)
-        for anime_type in retrieve_anime_type_choices
-    ]
-
-    return choices
+    return anime_types.choices()
@@ -4,7 +4,7 @@ from sqlalchemy import UniqueConstraint
 from sqlalchemy.orm import validates, relationship, backref
 
 # Extensions
-from src.models.extensions import BaseModel
+from src.models.extensions import BaseModel, trigram_index
 
 # Related models
 from src.models.anime.anime import Anime
@@ -34,4 +34,7 @@ class LinkAnimeName(BaseModel):
             "anime_name",
             name="uq_link_anime_name",
         ),
+        # anime name searches
+        trigram_index("link_anime_name", "anime_name"),
+        trigram_index("link_anime_name", "original_anime_name"),
     )
@@ -1,9 +1,9 @@
 # ORM
 import sqlalchemy as sa
-from sqlalchemy.orm import validates, relationship, backref
+from sqlalchemy.orm import validates, relationship, backref, deferred
 
 # Extensions
-from src.models.extensions import BaseModel
+from src.models.extensions import BaseModel, SearchDocument, search_index
 
 # Related models
 from src.models.artists.artist_type import ArtistType, retrieve_artist_type_choices
@@ -25,6 +25,21 @@ class Artist(BaseModel):
 
     artist_disambiguation = sa.Column(sa.String(200), nullable=True)
 
+    # copy of its primary name, to list and sort the artists, see
+    # src/models/display_names.py
+    display_name = sa.Column(sa.String, nullable=True)
+
+    # full-text search document of the artist, see src/models/search.py
+    search_document = deferred(sa.Column(SearchDocument, nullable=True))
+
+    __table_args__ = (
+        # keyset pagination of the artist list on its sort columns
+        sa.Index("ix_artist_id_artist_type_id", "id_artist_type", "id"),
+        sa.Index("ix_artist_artist_disambiguation_id", "artist_disambiguation", "id"),
+        sa.Index("ix_artist_display_name_id", "display_name", "id"),
+        search_index("artist"),
+    )
+
     # ----- Validators ----- #
     @validates("artist_name")
     def validate_territoire_coordination(self, key, value):
@@ -57,7 +72,7 @@ class ArtistUpdateForm(ModelForm, FlaskForm):
 
     class Meta:
         model = Artist
-        exclude = []
+        exclude = ["display_name", "search_document"]
         include = []
 
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,237 @@
+"""In-memory index of the artist names, answering the artist autocompletion.
+
+Every name and original name of every artist is lowercased and kept in a sorted array,
+a prefix search being a binary search in it. The names are also cut in n-grams of one
+to three characters, each n-gram pointing to the artists having a name containing it: a
+substring search of up to three characters is a single lookup, a longer one intersects
+the postings of its trigrams and checks the remaining candidates. No search queries the
+database.
+
+The index is loaded on its first search, and each artist is reloaded by the admin UI
+after its names change. It lives in the memory of each process, which follows the
+generations of the artists and artist names (see src/caching.py): when another process
+wrote them since, the whole index is loaded again on the next search.
+"""
+
+# Standard libraries
+import bisect
+import heapq
+import threading
+
+# ORM
+import sqlalchemy as sa
+
+# cache
+from src.caching import ARTIST_NAMES, ARTISTS, bump_generations, get_generations
+
+# models
+from src.models.artists.artist import Artist
+from src.models.artists.link_artist_names import LinkArtistName
+
+NGRAM_SIZE = 3
+
+
+def _ngrams(text: str, size: int) -> set:
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def _all_ngrams(text: str) -> set:
+    """Every n-gram of text, from one to NGRAM_SIZE characters."""
+    return set().union(*(_ngrams(text, size) for size in range(1, NGRAM_SIZE + 1)))
+
+
+class ArtistNameIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        # generations of the artists and artist names the index is up to date with
+        self._generations = None
+        # id_artist -> lowercased artist_name and original_artist_name of its names
+        self._texts = {}
+        # n-gram -> ids of the artists having a name containing it
+        self._postings = {}
+        # sorted (lowercased name, id_artist) pairs, for the prefix searches
+        self._prefixes = []
+        # id_artist -> the artist as returned by the autocompletion
+        self._artists = {}
+
+    # ----- Loading ----- #
+    def _select_artists(self, session, id_artists=None):
+        artists = sa.select(
+            Artist.id, Artist.id_artist_type, Artist.artist_disambiguation
+        )
+        names = sa.select(
+            LinkArtistName.id_artist,
+            LinkArtistName.artist_name,
+            LinkArtistName.original_artist_name,
+        ).order_by(LinkArtistName.id_artist, LinkArtistName.order, LinkArtistName.id)
+        if id_artists is not None:
+            artists = artists.where(Artist.id.in_(id_artists))
+            names = names.where(LinkArtistName.id_artist.in_(id_artists))
+
+        return session.execute(artists).all(), session.execute(names).all()
+
+    def _add(self, artists, names, insort=True):
+        texts = {}
+        for artist in artists:
+            self._artists[artist.id] = {
+                "id": artist.id,
+                "id_artist_type": artist.id_artist_type,
+                "artist_disambiguation": artist.artist_disambiguation,
+                "names": [],
+            }
+            texts[artist.id] = []
+
+        for name in names:
+            # names left behind by a deleted artist, where no foreign key removed them
+            if name.id_artist not in texts:
+                continue
+            self._artists[name.id_artist]["names"].append(
+                {
+                    "artist_name": name.artist_name,
+                    "original_artist_name": name.original_artist_name,
+                }
+            )
+            texts[name.id_artist].extend(
+                text.lower()
+                for text in (name.artist_name, name.original_artist_name)
+                if text
+            )
+
+        for id_artist, artist_texts in texts.items():
+            self._texts[id_artist] = tuple(artist_texts)
+            for ngram in set().union(*map(_all_ngrams, artist_texts)):
+                self._postings.setdefault(ngram, set()).add(id_artist)
+            for text in artist_texts:
+                if insort:
+                    bisect.insort(self._prefixes, (text, id_artist))
+                else:
+                    self._prefixes.append((text, id_artist))
+
+    def _remove(self, id_artist: int):
+        texts = self._texts.pop(id_artist, ())
+        for ngram in set().union(*map(_all_ngrams, texts)):
+            posting = self._postings[ngram]
+            posting.discard(id_artist)
+            if not posting:
+                del self._postings[ngram]
+        for text in texts:
+            del self._prefixes[bisect.bisect_left(self._prefixes, (text, id_artist))]
+        self._artists.pop(id_artist, None)
+
+    def load(self, session) -> None:
+        """Load every artist and artist name, replacing the current content."""
+
+        # read first, so a write during the loading is loaded again on the next search
+        generations = get_generations(ARTISTS, ARTIST_NAMES)
+        artists, names = self._select_artists(session)
+        with self._lock:
+            self._texts, self._postings, self._prefixes = {}, {}, []
+            self._artists = {}
+            self._add(artists, names, insort=False)
+            self._prefixes.sort()
+            self._loaded = True
+            self._generations = generations
+
+    def refresh(self, session, id_artist: int, *written: str) -> None:
+        """
+        Start a new generation of the written entities, invalidating the cached pages
+        and the indexes of the other processes, and reload an artist and its names after
+        they were added, updated, reordered or deleted.
+
+        Only the artist is reloaded when the index was up to date before the write.
+        Otherwise, or before the index is loaded, the next search loads it all.
+
+        Parameters
+        ----------
+        session : sqlalchemy.orm.Session
+            The session the artist was written with, after its commit.
+        id_artist : int
+            The id of the artist to reload.
+        *written : str
+            The written entities, ARTISTS and / or ARTIST_NAMES.
+        """
+
+        previous = get_generations(ARTISTS, ARTIST_NAMES)
+        generations = {**previous, **bump_generations(*written)}
+        if not self._loaded or previous != self._generations:
+            return
+
+        artists, names = self._select_artists(session, [id_artist])
+        with self._lock:
+            self._remove(id_artist)
+            self._add(artists, names)
+            self._generations = generations
+
+    # ----- Searching ----- #
+    def _prefixed_artists(self, search: str, limit: int) -> dict:
+        """The first artists, alphabetically, with a name starting with search."""
+
+        found = {}
+        i = bisect.bisect_left(self._prefixes, (search,))
+        while len(found) < limit and i < len(self._prefixes):
+            text, id_artist = self._prefixes[i]
+            if not text.startswith(search):
+                break
+            found[id_artist] = None
+            i += 1
+
+        return found
+
+    def _containing_artists(self, search: str):
+        """The artists with a name containing search."""
+
+        if len(search) <= NGRAM_SIZE:
+            return self._postings.get(search, ())
+
+        # the artists having every trigram of search, checked for the whole search
+        postings = [self._postings.get(ngram) for ngram in _ngrams(search, NGRAM_SIZE)]
+        if not all(postings):
+            return ()
+        return (
+            id_artist
+            for id_artist in set.intersection(*sorted(postings, key=len))
+            if any(search in text for text in self._texts[id_artist])
+        )
+
+    def search(self, session, search: str, limit: int = 100) -> list:
+        """
+        Find the artists having a name or an original name containing search.
+
+        Parameters
+        ----------
+        session : sqlalchemy.orm.Session
+            The session to load the index with, if it is not loaded yet.
+        search : str
+            The searched text, not case sensitive.
+        limit : int
+            The maximum number of artists returned.
+
+        Returns
+        -------
+        list of dict
+            The artists, with their names in order. The artists with a name starting
+            with search come first, sorted by that name, then the others by id.
+        """
+
+        if get_generations(ARTISTS, ARTIST_NAMES) != self._generations:
+            self.load(session)
+
+        search = (search or "").lower()
+        if not search or limit < 1:
+            return []
+
+        with self._lock:
+            found = self._prefixed_artists(search, limit)
+            if len(found) < limit:
+                others = (
+                    id_artist
+                    for id_artist in self._containing_artists(search)
+                    if id_artist not in found
+                )
+                found.update(dict.fromkeys(heapq.nsmallest(limit - len(found), others)))
+
+            return [self._artists[id_artist] for id_artist in found]
+
+
+artist_name_index = ArtistNameIndex()
@@ -2,6 +2,7 @@
 import sqlalchemy as sa
 from sqlalchemy.orm import validates
 from src.models.extensions import BaseModel
+from src.models.lookups import LookupTable
 
 # Forms
 from flask_wtf import FlaskForm
@@ -18,9 +19,12 @@ class ArtistType(BaseModel):
     artist_type = sa.Column(sa.String, nullable=False, unique=True)
 
 
+artist_types = LookupTable(ArtistType, "artist_type")
+
+
 def retrieve_artist_type_choices() -> List[Tuple]:
     """
-    Function to retrieve all artist_type from the database.
+    Function to retrieve all artist_type from the lookup registry.
 
     Returns
     -------
@@ -28,11 +32,4 @@ def retrieve_artist_type_choices() -> List[Tuple]:
         List of tuples containing the artist_type name and its ID.
     """
 
-    retrieve_artist_type_choices = ArtistType.query.all()
-
-    choices = [
-        (artist_type.id, artist_type.artist_type)
-        for artist_type in retrieve_artist_type_choices
-    ]
-
-    return choices
+    return artist_types.choices()
@@ -4,7 +4,7 @@ from sqlalchemy import UniqueConstraint
 from sqlalchemy.orm import validates, relationship, backref
 
 # Extensions
-from src.models.extensions import BaseModel
+from src.models.extensions import BaseModel, trigram_index
 
 # Related models
 from src.models.artists.artist import Artist
@@ -30,4 +30,9 @@ class LinkArtistName(BaseModel):
             "original_artist_name",
             name="uq_link_artist_name",
         ),
+        # primary name of an artist, the one with the lowest order
+        sa.Index("ix_link_artist_name_id_artist_order", "id_artist", "order"),
+        # artist name searches
+        trigram_index("link_artist_name", "artist_name"),
+        trigram_index("link_artist_name", "original_artist_name"),
     )
@@ -2,6 +2,7 @@
 import sqlalchemy as sa
 from sqlalchemy.orm import validates
 from src.models.extensions import BaseModel
+from src.models.lookups import LookupTable
 
 # Forms
 from flask_wtf import FlaskForm
@@ -18,9 +19,12 @@ class RoleType(BaseModel):
     role_type = sa.Column(sa.String, nullable=False, unique=True)
 
 
+role_types = LookupTable(RoleType, "role_type")
+
+
 def retrieve_role_type_choices() -> List[Tuple]:
     """
-    Function to retrieve all role_type from the database.
+    Function to retrieve all role_type from the lookup registry.
 
     Returns
     -------
@@ -28,10 +32,4 @@ def retrieve_role_type_choices() -> List[Tuple]:
         List of tuples containing the role_type name and its ID.
     """
 
-    retrieve_role_type_choices = RoleType.query.all()
-
-    choices = [
-        (role_type.id, role_type.role_type) for role_type in retrieve_role_type_choices
-    ]
-
-    return choices
+    return role_types.choices()
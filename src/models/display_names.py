@@ -0,0 +1,79 @@
+"""Display names of the artists and anime, stored on their rows to list and sort them.
+
+The display name of an artist is its name of lowest order, the one of an anime its
+Expand name, or its first name if it has none. They are copied from Link_Artist_Name and
+Link_Anime_Name into the display_name columns by the admin UI after every name change
+with refresh_display_names, or for every row with rebuild_display_names after an import.
+"""
+
+# ORM
+import sqlalchemy as sa
+
+# models
+from src.models.anime.anime import Anime
+from src.models.anime.link_anime_names import LinkAnimeName
+from src.models.artists.artist import Artist
+from src.models.artists.link_artist_names import LinkArtistName
+
+# importer
+from src.importer.mappings import ANIME_NAME_TYPE_MAPPING
+
+
+def artist_display_name():
+    return (
+        sa.select(LinkArtistName.artist_name)
+        .where(LinkArtistName.id_artist == Artist.id)
+        .order_by(LinkArtistName.order, LinkArtistName.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def anime_display_name():
+    expand = ANIME_NAME_TYPE_MAPPING["Expand"]
+
+    return (
+        sa.select(LinkAnimeName.anime_name)
+        .where(LinkAnimeName.id_anime == Anime.id)
+        .order_by(LinkAnimeName.id_anime_name_type != expand, LinkAnimeName.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _update(model, display_name, where=None):
+    statement = sa.update(model).values(display_name=display_name)
+    if where is not None:
+        statement = statement.where(where)
+    return statement.execution_options(synchronize_session=False)
+
+
+def refresh_display_names(connection, anime_ids=(), artist_ids=()) -> None:
+    """
+    Copy the display names of the given rows again, after their names changed.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.engine.Connection or sqlalchemy.orm.Session
+        The connection or session the names were written with, flushed.
+    anime_ids, artist_ids : iterable of int
+        The ids of the rows to refresh.
+    """
+
+    anime_ids, artist_ids = list(anime_ids), list(artist_ids)
+
+    if artist_ids:
+        connection.execute(
+            _update(Artist, artist_display_name(), Artist.id.in_(artist_ids))
+        )
+    if anime_ids:
+        connection.execute(
+            _update(Anime, anime_display_name(), Anime.id.in_(anime_ids))
+        )
+
+
+def rebuild_display_names(connection) -> None:
+    """Copy the display names of every artist and anime."""
+
+    connection.execute(_update(Artist, artist_display_name()))
+    connection.execute(_update(Anime, anime_display_name()))
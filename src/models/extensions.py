@@ -7,10 +7,12 @@ Inspired by https://github.com/lafrech/flask-smorest-sqlalchemy-example/blob/mas
 
 # marshmallow schema override to automatically include update method with SQLAlchemyAutoSchema
 import json
-from sqlalchemy import inspect
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 # ORM
 from src.extensions import db
+from src.models.serializers import serializer
 
 
 class BaseModel(db.Model):
@@ -18,22 +20,57 @@ class BaseModel(db.Model):
 
     __abstract__ = True
 
-    def as_dict(self):
-        # Get the columns of the current class
-        current_columns = {
-            c.name: getattr(self, c.name) for c in self.__table__.columns
-        }
+    def as_dict(self, fields=None, exclude=(), json_safe=False):
+        """
+        Return the column values of the row, see src/models/serializers.py
 
-        # Get the columns of the inherited class if there is one
-        inherited_columns = {
-            c.key: getattr(self, c.key)
-            for c in inspect(self.__class__).mapper.column_attrs
-        }
+        Parameters
+        ----------
+        fields : iterable of str
+            The columns to serialize, in order, all of them if None
+        exclude : iterable of str
+            The columns to leave out
+        json_safe : bool
+            Convert the dates and times to ISO strings and the decimals to floats
+        """
 
-        # Combine both dictionaries
-        output_dict = {**current_columns, **inherited_columns}
-
-        return output_dict
+        return serializer(type(self), fields, exclude, json_safe)(self)
 
     def as_json(self):
-        return json.dumps(self.as_dict())
+        return json.dumps(self.as_dict(json_safe=True))
+
+
+def trigram_index(prefix: str, column_name: str) -> sa.Index:
+    """
+    GIN pg_trgm index serving the ILIKE '%term%' searches on a column.
+
+    It is only created on PostgreSQL, other databases don't have pg_trgm.
+
+    Parameters
+    ----------
+    prefix : str
+        The prefix of the index name, the table name in snake case
+    column_name : str
+        The searched column
+    """
+
+    return sa.Index(
+        f"ix_{prefix}_{column_name}_trgm",
+        column_name,
+        postgresql_using="gin",
+        postgresql_ops={column_name: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
+
+
+# type of the full-text search documents, see src/models/search.py
+SearchDocument = sa.Text().with_variant(TSVECTOR(), "postgresql")
+
+
+def search_index(prefix: str) -> sa.Index:
+    """GIN index of the search_document column of a table, PostgreSQL only."""
+
+    return sa.Index(
+        f"ix_{prefix}_search_document",
+        "search_document",
+        postgresql_using="gin",
+    ).ddl_if(dialect="postgresql")
@@ -0,0 +1,17 @@
+# ORM
+import sqlalchemy as sa
+from src.models.extensions import BaseModel
+
+
+# ----- Database ORM ----- #
+class ImportCheckpoint(BaseModel):
+    """Progress of the last populate_database.py run, committed with each imported chunk."""
+
+    __tablename__ = "Import_Checkpoint"
+    id = sa.Column(sa.Integer, primary_key=True)
+    # "artists", "anime" or "done": the phase the import is in
+    phase = sa.Column(sa.String, nullable=False)
+    # number of raw anime entries already committed
+    anime_done = sa.Column(sa.Integer, nullable=False, default=0)
+    # artist_id_mapping.json content, known once the artists are committed
+    artist_id_mapping = sa.Column(sa.Text)
@@ -0,0 +1,76 @@
+"""Lookup tables, the small tables naming the types of the other rows.
+
+Each lookup table (AnimeType, AnimeNameType, ArtistType, RoleType, SongCategory,
+SongType) is read once per process and kept in memory, serving its choices and its
+id <-> name lookups without querying the database. Nothing in the app or the importer
+writes them, their rows only change by hand: bump_generations(LOOKUPS) must then be
+called, starting a new generation of them (see src/caching.py) so that every process
+reads them again on their next use.
+"""
+
+# Standard libraries
+from typing import List, Tuple
+
+# flask
+from flask import g, has_app_context
+
+# ORM
+import sqlalchemy as sa
+
+# extensions
+from src.extensions import db
+from src.caching import LOOKUPS, get_generations
+
+
+def _current_generation():
+    # read once per request, the lookups being used several times by a page
+    if not has_app_context():
+        return get_generations(LOOKUPS)[LOOKUPS]
+    if "lookup_generation" not in g:
+        g.lookup_generation = get_generations(LOOKUPS)[LOOKUPS]
+    return g.lookup_generation
+
+
+class LookupTable:
+    """
+    In-memory copy of a lookup table.
+
+    Parameters
+    ----------
+    model : BaseModel
+        The model of the lookup table.
+    name_column : str
+        The column holding the name of each row.
+    """
+
+    def __init__(self, model, name_column: str):
+        self.model = model
+        self.name_column = name_column
+        self._generation = None
+        self._names = {}
+        self._ids = {}
+
+    def _table(self) -> "LookupTable":
+        generation = _current_generation()
+        if generation != self._generation:
+            rows = db.session.execute(
+                sa.select(
+                    self.model.id, getattr(self.model, self.name_column)
+                ).order_by(self.model.id)
+            ).all()
+            self._names = {id_: name for id_, name in rows}
+            self._ids = {name: id_ for id_, name in rows}
+            self._generation = generation
+        return self
+
+    def choices(self) -> List[Tuple]:
+        """Return the (id, name) of every row, ordered by id"""
+        return list(self._table()._names.items())
+
+    def name(self, id_: int) -> str:
+        """Return the name of the row id_, None if there is none"""
+        return self._table()._names.get(id_)
+
+    def id(self, name: str) -> int:
+        """Return the id of the row named name, None if there is none"""
+        return self._table()._ids.get(name)
@@ -0,0 +1,116 @@
+"""Schema upgrades for existing databases.
+
+db.create_all only creates the missing tables, it doesn't touch the tables that already
+exist. Everything added to an existing table after its creation, columns and indexes, is
+listed here and applied by upgrade_schema, which is safe to run on every start. The
+PostgreSQL extensions the indexes rely on are created first, by create_all as well.
+Tables that only the importer uses are created here too, as populate_database.py doesn't
+go through db.create_all.
+"""
+
+# ORM
+import sqlalchemy as sa
+
+# models
+from src.extensions import db
+from src.models.anime.anime import Anime
+from src.models.anime.link_anime_names import LinkAnimeName
+from src.models.artists.artist import Artist
+from src.models.artists.link_artist_names import LinkArtistName
+from src.models.songs.song import Song
+from src.models.importer.import_checkpoint import ImportCheckpoint
+from src.models.display_names import rebuild_display_names
+from src.models.search import rebuild_search_documents
+
+# PostgreSQL extensions used by the schema, pg_trgm for the trigram indexes
+POSTGRESQL_EXTENSIONS = ["pg_trgm"]
+
+# Tables added after the initial schema
+ADDED_TABLES = [
+    ImportCheckpoint.__table__,
+]
+
+# Columns added to tables after their creation
+ADDED_COLUMNS = [
+    Anime.__table__.c.content_hash,
+    Song.__table__.c.content_hash,
+    Anime.__table__.c.search_document,
+    Artist.__table__.c.search_document,
+    Song.__table__.c.search_document,
+    Anime.__table__.c.display_name,
+    Artist.__table__.c.display_name,
+]
+
+# Indexes added to tables after their creation
+ADDED_INDEXES = sorted(
+    [
+        *Anime.__table__.indexes,
+        *Artist.__table__.indexes,
+        *LinkAnimeName.__table__.indexes,
+        *LinkArtistName.__table__.indexes,
+        *Song.__table__.indexes,
+    ],
+    key=lambda index: index.name,
+)
+
+
+def create_extensions(connection):
+    """Create the missing POSTGRESQL_EXTENSIONS, on PostgreSQL only."""
+
+    if connection.dialect.name != "postgresql":
+        return
+
+    for extension in POSTGRESQL_EXTENSIONS:
+        connection.execute(sa.text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+
+
+# the extensions must exist before create_all creates the indexes using them
+sa.event.listen(
+    db.metadata,
+    "before_create",
+    lambda target, connection, **kw: create_extensions(connection),
+)
+
+
+def upgrade_schema(connection):
+    """
+    Add the missing tables of ADDED_TABLES, columns of ADDED_COLUMNS and indexes of
+    ADDED_INDEXES to an existing database.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.engine.Connection
+        The connection to upgrade the schema with.
+    """
+
+    create_extensions(connection)
+
+    for table in ADDED_TABLES:
+        table.create(connection, checkfirst=True)
+
+    inspector = sa.inspect(connection)
+
+    added_columns = []
+    for column in ADDED_COLUMNS:
+        table_name = column.table.name
+        existing_columns = {c["name"] for c in inspector.get_columns(table_name)}
+        if column.name in existing_columns:
+            continue
+        added_columns.append(column.name)
+
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(
+            sa.text(
+                f'ALTER TABLE "{table_name}" ADD COLUMN "{column.name}" {column_type}'
+            )
+        )
+
+    for index in ADDED_INDEXES:
+        index.create(connection, checkfirst=True)
+
+    # the search documents and display names of the existing rows are built once, when
+    # their column is added
+    if "search_document" in added_columns:
+        rebuild_search_documents(connection)
+    if "display_name" in added_columns:
+        rebuild_display_names(connection)
@@ -0,0 +1,268 @@
+"""Full-text search documents of the songs, anime and artists.
+
+Each searchable row keeps a weighted tsvector in its search_document column:
+- A : the romaji names (song name and artist, anime names, artist names)
+- B : the original (Japanese) and alternative names, the artist disambiguation
+- C : the credits of a song, its composer and arranger fields and the names of every
+  credited artist
+
+The documents are built in SQL from the rows they index, and rebuilt by the admin UI after
+every write with refresh_search_documents, or for every row with rebuild_search_documents
+after an import. search_statement matches the three kinds of documents at once, ranked
+with ts_rank. Searching is only supported on PostgreSQL, other databases keep the column
+empty.
+"""
+
+# Standard libraries
+from functools import reduce
+
+# ORM
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+# models
+from src.models.anime.anime import Anime
+from src.models.anime.link_anime_names import LinkAnimeName
+from src.models.artists.artist import Artist
+from src.models.artists.link_artist_names import LinkArtistName
+from src.models.songs.link_song_artist import LinkSongArtist
+from src.models.songs.song import Song
+
+# importer
+from src.importer.mappings import ANIME_NAME_TYPE_MAPPING
+
+# no stemming nor stop words, the names being romaji and Japanese rather than English
+SEARCH_CONFIG = "simple"
+
+
+def _config():
+    return sa.literal(SEARCH_CONFIG, type_=REGCONFIG)
+
+
+def _joined(*values):
+    # concat_ws skips the NULL values
+    return sa.func.concat_ws(" ", *values)
+
+
+def _aggregated(column, *where):
+    """Space separated values of column over the rows matching where."""
+    return (
+        sa.select(sa.func.string_agg(column, sa.literal_column("' '")))
+        .where(*where)
+        .scalar_subquery()
+    )
+
+
+def _document(weighted_texts: dict):
+    """Concatenate the tsvectors of texts, each weighted with its key."""
+    return reduce(
+        lambda document, vector: document.op("||")(vector),
+        [
+            sa.func.setweight(sa.func.to_tsvector(_config(), text), weight)
+            for weight, text in weighted_texts.items()
+        ],
+    )
+
+
+def song_document():
+    credited_names = (
+        sa.select(
+            sa.func.string_agg(
+                _joined(
+                    LinkArtistName.artist_name, LinkArtistName.original_artist_name
+                ),
+                sa.literal_column("' '"),
+            )
+        )
+        .join(LinkSongArtist, LinkSongArtist.id_artist == LinkArtistName.id_artist)
+        .where(LinkSongArtist.id_song == Song.id)
+        .scalar_subquery()
+    )
+
+    return _document(
+        {
+            "A": _joined(Song.song_name, Song.song_artist),
+            "B": _joined(Song.original_song_name, Song.original_song_artist),
+            "C": _joined(
+                Song.song_composer,
+                Song.original_song_composer,
+                Song.song_arranger,
+                Song.original_song_arranger,
+                credited_names,
+            ),
+        }
+    )
+
+
+def anime_document():
+    alternative = ANIME_NAME_TYPE_MAPPING["Alternative"]
+
+    return _document(
+        {
+            "A": _aggregated(
+                LinkAnimeName.anime_name,
+                LinkAnimeName.id_anime == Anime.id,
+                LinkAnimeName.id_anime_name_type != alternative,
+            ),
+            "B": _joined(
+                _aggregated(
+                    LinkAnimeName.anime_name,
+                    LinkAnimeName.id_anime == Anime.id,
+                    LinkAnimeName.id_anime_name_type == alternative,
+                ),
+                _aggregated(
+                    LinkAnimeName.original_anime_name,
+                    LinkAnimeName.id_anime == Anime.id,
+                ),
+            ),
+        }
+    )
+
+
+def artist_document():
+    return _document(
+        {
+            "A": _aggregated(
+                LinkArtistName.artist_name, LinkArtistName.id_artist == Artist.id
+            ),
+            "B": _joined(
+                _aggregated(
+                    LinkArtistName.original_artist_name,
+                    LinkArtistName.id_artist == Artist.id,
+                ),
+                Artist.artist_disambiguation,
+            ),
+        }
+    )
+
+
+def _dialect_name(connection) -> str:
+    # a Connection, or a Session resolving its bind
+    dialect = getattr(connection, "dialect", None) or connection.get_bind().dialect
+    return dialect.name
+
+
+def _update(model, document, where=None):
+    statement = sa.update(model).values(search_document=document)
+    if where is not None:
+        statement = statement.where(where)
+    return statement.execution_options(synchronize_session=False)
+
+
+def refresh_search_documents(
+    connection, song_ids=(), anime_ids=(), artist_ids=()
+) -> None:
+    """
+    Rebuild the search documents of the given rows, after they or their names changed.
+
+    The songs crediting one of the artists are rebuilt too, their documents holding the
+    names of their credited artists. New rows must be flushed first, to have an id.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.engine.Connection or sqlalchemy.orm.Session
+        The connection or session the rows were written with.
+    song_ids, anime_ids, artist_ids : iterable of int
+        The ids of the rows to rebuild.
+    """
+
+    if _dialect_name(connection) != "postgresql":
+        return
+
+    song_ids, anime_ids, artist_ids = list(song_ids), list(anime_ids), list(artist_ids)
+
+    if artist_ids:
+        connection.execute(
+            _update(Artist, artist_document(), Artist.id.in_(artist_ids))
+        )
+    if anime_ids:
+        connection.execute(_update(Anime, anime_document(), Anime.id.in_(anime_ids)))
+    if song_ids or artist_ids:
+        connection.execute(
+            _update(
+                Song,
+                song_document(),
+                Song.id.in_(song_ids)
+                | Song.id.in_(
+                    sa.select(LinkSongArtist.id_song).where(
+                        LinkSongArtist.id_artist.in_(artist_ids)
+                    )
+                ),
+            )
+        )
+
+
+def rebuild_search_documents(connection) -> None:
+    """Rebuild the search documents of every song, anime and artist."""
+
+    if _dialect_name(connection) != "postgresql":
+        return
+
+    for model, document in (
+        (Artist, artist_document()),
+        (Anime, anime_document()),
+        (Song, song_document()),
+    ):
+        connection.execute(_update(model, document))
+
+
+def search_statement(search: str, limit: int = 50):
+    """
+    Select the songs, anime and artists matching a search, best ranked first.
+
+    Parameters
+    ----------
+    search : str
+        The searched text, in websearch_to_tsquery syntax: words, "quoted phrases", or
+        and -excluded words.
+    limit : int
+        The maximum number of results.
+
+    Returns
+    -------
+    sqlalchemy.sql.Select
+        Rows of (type, id, page_id, label, detail, rank), type being "song", "anime" or
+        "artist" and page_id the id of its admin UI page, the ann_id of the anime.
+    """
+
+    query = sa.func.websearch_to_tsquery(_config(), search)
+
+    anime_name = (
+        sa.select(LinkAnimeName.anime_name)
+        .where(
+            LinkAnimeName.id_anime == Anime.id,
+            LinkAnimeName.id_anime_name_type == ANIME_NAME_TYPE_MAPPING["Expand"],
+        )
+        .order_by(LinkAnimeName.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    artist_name = (
+        sa.select(LinkArtistName.artist_name)
+        .where(LinkArtistName.id_artist == Artist.id)
+        .order_by(LinkArtistName.order, LinkArtistName.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    def matches(type_: str, model, page_id, label, detail):
+        return sa.select(
+            sa.literal(type_).label("type"),
+            model.id.label("id"),
+            page_id.label("page_id"),
+            sa.cast(label, sa.String).label("label"),
+            sa.cast(detail, sa.String).label("detail"),
+            sa.func.ts_rank(model.search_document, query).label("rank"),
+        ).where(model.search_document.op("@@")(query))
+
+    results = sa.union_all(
+        matches("song", Song, Song.id, Song.song_name, Song.song_artist),
+        matches("anime", Anime, Anime.ann_id, anime_name, Anime.anime_vintage),
+        matches("artist", Artist, Artist.id, artist_name, Artist.artist_disambiguation),
+    ).subquery()
+
+    return (
+        sa.select(results)
+        .order_by(results.c.rank.desc(), results.c.type, results.c.id)
+        .limit(limit)
+    )
@@ -0,0 +1,133 @@
+"""Serializers of the model rows into dicts, compiled once per model.
+
+A serializer is built from the mapper of its model on its first use: the keys of the
+columns, their getters and the conversions of their values are computed once and kept,
+so serializing a row only reads its attributes into a dict. BaseModel.as_dict uses them,
+the list views get them once per page with serializer.
+"""
+
+# Standard libraries
+import datetime
+import decimal
+import functools
+import operator
+from typing import Callable, Iterable
+
+# ORM
+from sqlalchemy import inspect
+
+# conversions of the values json can't encode, by python type of the column
+JSON_CONVERSIONS = {
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    decimal.Decimal: float,
+}
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def model_columns(model) -> dict:
+    """
+    Return the serialized columns of a model, by key
+
+    The columns of its table come first, then the ones of the tables it inherits from.
+    Deferred columns, such as the search documents, aren't loaded with the rows and
+    are left out.
+    """
+
+    column_attrs = inspect(model).mapper.column_attrs
+    deferred = {c.key for c in column_attrs if c.deferred}
+
+    columns = {c.name: c for c in model.__table__.columns if c.name not in deferred}
+    for attr in column_attrs:
+        if attr.key not in deferred:
+            columns.setdefault(attr.key, attr.columns[0])
+
+    return columns
+
+
+@functools.lru_cache(maxsize=None)
+def _compile(model, fields: tuple, exclude: tuple, json_safe: bool) -> Callable:
+    columns = model_columns(model)
+
+    unknown = [key for key in (fields or ()) + exclude if key not in columns]
+    if unknown:
+        raise ValueError(
+            {"fields": f"{', '.join(unknown)} not columns of {model.__name__}"}
+        )
+
+    keys = tuple(key for key in (fields or tuple(columns)) if key not in set(exclude))
+    conversions = ()
+    if json_safe:
+        conversions = tuple(
+            (i, JSON_CONVERSIONS[_python_type(columns[key])])
+            for i, key in enumerate(keys)
+            if _python_type(columns[key]) in JSON_CONVERSIONS
+        )
+
+    if not keys:
+        return lambda row: {}
+    if len(keys) == 1:
+        # attrgetter of a single attribute returns the value, not a tuple
+        key = keys[0]
+        get = operator.attrgetter(key)
+        getter = lambda row: (get(row),)
+    else:
+        getter = operator.attrgetter(*keys)
+
+    if not conversions:
+        return lambda row: dict(zip(keys, getter(row)))
+
+    def serialize(row) -> dict:
+        values = list(getter(row))
+        for i, convert in conversions:
+            if values[i] is not None:
+                values[i] = convert(values[i])
+        return dict(zip(keys, values))
+
+    return serialize
+
+
+def serializer(
+    model,
+    fields: Iterable[str] = None,
+    exclude: Iterable[str] = (),
+    json_safe: bool = False,
+) -> Callable:
+    """
+    Return the serializer of a model, compiling it on its first use
+
+    Parameters
+    ----------
+    model : BaseModel
+        The model of the serialized rows
+    fields : iterable of str
+        The columns to serialize, in order, all of them if None
+    exclude : iterable of str
+        The columns to leave out
+    json_safe : bool
+        Convert the dates and times to ISO strings and the decimals to floats
+
+    Returns
+    -------
+    callable
+        Function serializing a row of model into a dict of its column values
+
+    Raises
+    ------
+    ValueError
+        If one of the fields isn't a column of model
+    """
+
+    return _compile(
+        model,
+        tuple(fields) if fields is not None else None,
+        tuple(exclude),
+        json_safe,
+    )
@@ -1,10 +1,15 @@
 # ORM
 import sqlalchemy as sa
 from sqlalchemy import UniqueConstraint
-from sqlalchemy.orm import validates, relationship, backref
+from sqlalchemy.orm import validates, relationship, backref, deferred
 
 # Extensions
-from src.models.extensions import BaseModel
+from src.models.extensions import (
+    BaseModel,
+    SearchDocument,
+    search_index,
+    trigram_index,
+)
 
 # Related models
 from src.models.songs.song_type import SongType, retrieve_song_types_choices
@@ -57,6 +62,12 @@ class Song(BaseModel):
     MQ = sa.Column(sa.String, nullable=True)
     audio = sa.Column(sa.String, nullable=True)
 
+    # hash of the raw entry, used by the delta import to skip unchanged songs
+    content_hash = sa.Column(sa.String(64), nullable=True)
+
+    # full-text search document of the song, see src/models/search.py
+    search_document = deferred(sa.Column(SearchDocument, nullable=True))
+
     __table_args__ = (
         UniqueConstraint(
             "id_anime",
@@ -66,6 +77,15 @@ class Song(BaseModel):
             "song_artist",
             name="uq_song",
         ),
+        # keyset pagination of the song list on its sort columns
+        sa.Index("ix_song_song_name_id", "song_name", "id"),
+        sa.Index("ix_song_song_artist_id", "song_artist", "id"),
+        # song name and artist searches
+        trigram_index("song", "song_name"),
+        trigram_index("song", "original_song_name"),
+        trigram_index("song", "song_artist"),
+        trigram_index("song", "original_song_artist"),
+        search_index("song"),
     )
 
 
@@ -91,7 +111,7 @@ class SongUpdateForm(ModelForm, FlaskForm):
 
     class Meta:
         model = Song
-        exclude = []
+        exclude = ["content_hash", "search_document"]
         include = ["id_song_type"]
 
     def __init__(self, *args, **kwargs):
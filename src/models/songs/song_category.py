@@ -2,6 +2,7 @@
 import sqlalchemy as sa
 from sqlalchemy.orm import validates
 from src.models.extensions import BaseModel
+from src.models.lookups import LookupTable
 
 # Forms
 from flask_wtf import FlaskForm
@@ -18,9 +19,12 @@ class SongCategory(BaseModel):
     song_category = sa.Column(sa.String, nullable=False, unique=True)
 
 
+song_categories = LookupTable(SongCategory, "song_category")
+
+
 def retrieve_song_categories_choices() -> List[Tuple]:
     """
-    Function to retrieve all song_categorys from the database.
+    Function to retrieve all song_categorys from the lookup registry.
 
     Returns
     -------
@@ -28,11 +32,4 @@ def retrieve_song_categories_choices() -> List[Tuple]:
         List of tuples containing the song_category name and its ID.
     """
 
-    retrieve_song_categories_choices = SongCategory.query.all()
-
-    choices = [
-        (song_category.id, song_category.song_category)
-        for song_category in retrieve_song_categories_choices
-    ]
-
-    return choices
+    return song_categories.choices()
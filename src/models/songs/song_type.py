@@ -2,6 +2,7 @@
 import sqlalchemy as sa
 from sqlalchemy.orm import validates
 from src.models.extensions import BaseModel
+from src.models.lookups import LookupTable
 
 # Forms
 from flask_wtf import FlaskForm
@@ -18,9 +19,12 @@ class SongType(BaseModel):
     song_type = sa.Column(sa.String, nullable=False, unique=True)
 
 
+song_types = LookupTable(SongType, "song_type")
+
+
 def retrieve_song_types_choices() -> List[Tuple]:
     """
-    Function to retrieve all song_types from the database.
+    Function to retrieve all song_types from the lookup registry.
 
     Returns
     -------
@@ -28,10 +32,4 @@ def retrieve_song_types_choices() -> List[Tuple]:
         List of tuples containing the song_type name and its ID.
     """
 
-    retrieve_song_types_choices = SongType.query.all()
-
-    choices = [
-        (song_type.id, song_type.song_type) for song_type in retrieve_song_types_choices
-    ]
-
-    return choices
+    return song_types.choices()
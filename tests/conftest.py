@@ -0,0 +1,70 @@
+# Standard libraries
+import pytest
+
+# flask
+from flask import Flask
+
+# ORM
+import sqlalchemy as sa
+
+# models
+from src import register_blueprint
+from src.extensions import cache, db, override_url_for
+from src.json_provider import JSONProvider
+from src.models.schema import upgrade_schema
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App on a fresh SQLite database, the PostgreSQL one of create_app being unneeded."""
+
+    app = Flask("src", static_folder=None)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'test.db'}",
+        CACHE_TYPE="SimpleCache",
+        SECRET_KEY="test",
+        WTF_CSRF_ENABLED=False,
+        APP_VERSION="test",
+        AUTHORIZED_USERS=["test"],
+    )
+    app.json = JSONProvider(app)
+    app.context_processor(override_url_for)
+    cache.init_app(app)
+    db.init_app(app)
+    register_blueprint(app)
+
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            upgrade_schema(connection)
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    """Test client logged in as the test user."""
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = "test"
+    return client
+
+
+@pytest.fixture
+def count_statements(app):
+    """Return a function running a request and counting the statements it executes."""
+
+    def count(request):
+        statements = []
+
+        def before_cursor_execute(connection, cursor, statement, *args):
+            statements.append(statement)
+
+        sa.event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = request()
+        finally:
+            sa.event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        return response, len(statements)
+
+    return count
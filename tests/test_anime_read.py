@@ -0,0 +1,52 @@
+# models
+from src.extensions import db
+from src.models.anime.anime import Anime
+from src.models.anime.anime_name_type import AnimeNameType
+from src.models.anime.anime_type import AnimeType
+from src.models.anime.genre import Genre
+from src.models.anime.link_anime_genres import LinkAnimeGenre
+from src.models.anime.link_anime_names import LinkAnimeName
+from src.models.anime.link_anime_tags import LinkAnimeTag
+from src.models.anime.tag import Tag
+from src.models.display_names import rebuild_display_names
+
+ANIME_COUNT = 30
+
+
+def populate_anime():
+    db.session.add_all(
+        [
+            AnimeType(id=1, anime_type="TV"),
+            AnimeNameType(id=1, anime_name_type="Expand"),
+            AnimeNameType(id=2, anime_name_type="Alternative"),
+            *[Genre(id=i, genre=f"Genre {i}") for i in range(1, 4)],
+            *[Tag(id=i, tag=f"Tag {i}") for i in range(1, 4)],
+        ]
+    )
+    for i in range(1, ANIME_COUNT + 1):
+        db.session.add_all(
+            [
+                Anime(id=i, ann_id=1000 + i, id_anime_type=1, anime_vintage="2020"),
+                LinkAnimeName(id_anime=i, id_anime_name_type=1, anime_name=f"A {i}"),
+                LinkAnimeName(id_anime=i, id_anime_name_type=2, anime_name=f"B {i}"),
+                LinkAnimeGenre(id_anime=i, id_genre=1),
+                LinkAnimeGenre(id_anime=i, id_genre=2),
+                LinkAnimeTag(id_anime=i, id_tag=1 + i % 3),
+            ]
+        )
+    db.session.flush()
+    rebuild_display_names(db.session)
+    db.session.commit()
+
+
+def test_anime_read_query_count_is_constant(client, count_statements):
+    populate_anime()
+    # loads the lookup tables of the search form, read once per process
+    client.get("/anime/?page_size=1")
+
+    small, small_count = count_statements(lambda: client.get("/anime/?page_size=5"))
+    large, large_count = count_statements(lambda: client.get("/anime/?page_size=25"))
+
+    assert small.status_code == large.status_code == 200
+    assert b"Genre 2" in large.data and b"Tag 3" in large.data
+    assert small_count == large_count
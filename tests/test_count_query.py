@@ -0,0 +1,89 @@
+# Standard libraries
+import pytest
+
+# models
+from src.extensions import db
+from src.models.artists.artist import Artist
+from src.models.artists.artist_type import ArtistType
+from src.caching import ARTISTS, bump_generations
+
+# utils
+from src.admin_ui import utils
+from src.admin_ui.utils import count_query
+
+ARTIST_COUNT = 30
+THRESHOLD = 10
+ESTIMATE = 1000
+
+
+@pytest.fixture
+def artists(app, monkeypatch):
+    app.config["EXACT_COUNT_THRESHOLD"] = THRESHOLD
+    # the planner estimate of PostgreSQL, SQLite having none
+    estimates = []
+
+    def estimate_count(query):
+        estimates.append(query)
+        return ESTIMATE
+
+    monkeypatch.setattr(utils, "estimate_count", estimate_count)
+
+    db.session.add(ArtistType(id=1, artist_type="Artist"))
+    db.session.add_all(
+        [
+            Artist(id=i, id_artist_type=1, display_name=f"Artist {i}")
+            for i in range(1, ARTIST_COUNT + 1)
+        ]
+    )
+    db.session.commit()
+    return estimates
+
+
+def test_small_results_are_counted_in_one_statement(client, artists, count_statements):
+    response, statements = count_statements(
+        lambda: client.get(
+            "/artists/?sort_by=id&order=desc&page_size=5&artist_name=nobody"
+        )
+    )
+
+    assert response.status_code == 200
+    assert b"about" not in response.data
+    # the bounded count and the page
+    assert statements == 2
+    assert not artists
+
+
+def test_large_results_are_estimated(client, artists):
+    response = client.get("/artists/?page_size=5")
+
+    assert response.status_code == 200
+    assert len(artists) == 1
+    assert f"about {ESTIMATE // 5} pages".encode() in response.data
+    assert b"Count exactly" in response.data
+
+
+def test_exact_count_overrides_the_estimate(client, artists):
+    response = client.get("/artists/?page_size=5&count=exact")
+
+    assert response.status_code == 200
+    assert not artists
+    assert b"about" not in response.data
+    assert f"{ARTIST_COUNT // 5}".encode() in response.data
+
+
+def test_exact_counts_are_cached_until_a_write(app, artists, count_statements):
+    query = db.session.query(Artist)
+    with app.test_request_context():
+        assert count_query(query, exact=True, entities=[ARTISTS]) == (30, False)
+
+        db.session.add(Artist(id=ARTIST_COUNT + 1, id_artist_type=1))
+        db.session.commit()
+        # the cached count is served to the estimated pages too, without a statement
+        cached, statements = count_statements(
+            lambda: count_query(query, entities=[ARTISTS])
+        )
+        assert cached == (30, False)
+        assert statements == 0
+
+        bump_generations(ARTISTS)
+        assert count_query(query, exact=True, entities=[ARTISTS]) == (31, False)
@@ -0,0 +1,68 @@
+# Standard libraries
+import dataclasses
+import datetime
+import decimal
+import uuid
+
+import pytest
+
+# models
+from src.models.songs.song import Song
+
+# utils
+from src.json_provider import STREAM_CHUNK_SIZE, JSONProvider, stream_json
+
+
+@dataclasses.dataclass
+class Credit:
+    role: str
+    since: datetime.date
+
+
+def song_payload(id_: int) -> dict:
+    """An as_dict() row, with the values json can't encode by itself."""
+
+    song = Song(
+        id=id_,
+        song_name=f"Sôngu {id_}",
+        original_song_name=f"ソング {id_}",
+        song_artist="Artist",
+        original_song_artist=None,
+        song_number=1,
+    )
+    return {
+        **song.as_dict(),
+        "updated_at": datetime.datetime(2024, 5, 1, 12, 30),
+        "released": datetime.date(2024, 6, 1),
+        "score": decimal.Decimal("12.50"),
+        "uuid": uuid.UUID(int=id_),
+        "credit": Credit(role="Vocals", since=datetime.date(2020, 1, 1)),
+        "ratio": 0.1,
+    }
+
+
+def encoded(app, encoder: str, build) -> bytes:
+    app.json = JSONProvider(app, encoder)
+    with app.test_request_context():
+        return build().get_data()
+
+
+def test_encoders_give_the_same_bytes(app):
+    build = lambda: app.json.response(song_payload(1))
+
+    orjson_bytes = encoded(app, "orjson", build)
+
+    assert orjson_bytes == encoded(app, "json", build)
+    assert "ソング 1".encode() in orjson_bytes
+    assert b'"released":"Sat, 01 Jun 2024 00:00:00 GMT"' in orjson_bytes
+    assert b'"credit":{"role":"Vocals"' in orjson_bytes
+
+
+@pytest.mark.parametrize("count", [0, 1, STREAM_CHUNK_SIZE + 1])
+def test_streamed_encoders_give_the_same_bytes(app, count):
+    build = lambda: stream_json(song_payload(i) for i in range(count))
+
+    orjson_bytes = encoded(app, "orjson", build)
+
+    assert orjson_bytes == encoded(app, "json", build)
+    assert len(app.json.loads(orjson_bytes)) == count
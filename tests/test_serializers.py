@@ -0,0 +1,127 @@
+# Standard libraries
+import datetime
+import decimal
+import statistics
+import time
+
+# ORM
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import inspect
+from sqlalchemy.orm import declarative_base
+
+# models
+from src.models.anime.anime import Anime
+from src.models.artists.artist import Artist
+from src.models.artists.line_up import LineUp
+from src.models.songs.link_song_artist import LinkSongArtist
+from src.models.songs.song import Song
+from src.models.serializers import serializer
+
+MODELS = [Song, Artist, Anime, LineUp, LinkSongArtist]
+ROWS = 2000
+
+# a model with the column types json can't encode, none of the app's having them
+Base = declarative_base()
+
+
+class Invoice(Base):
+    __tablename__ = "Invoice"
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    issued_at = sa.Column(sa.DateTime)
+    due = sa.Column(sa.Date)
+    amount = sa.Column(sa.Numeric(10, 2))
+
+
+def legacy_as_dict(row) -> dict:
+    """BaseModel.as_dict before the compiled serializers."""
+
+    column_attrs = inspect(row.__class__).mapper.column_attrs
+    deferred = {c.key for c in column_attrs if c.deferred}
+    current_columns = {
+        c.name: getattr(row, c.name)
+        for c in row.__table__.columns
+        if c.name not in deferred
+    }
+    inherited_columns = {
+        c.key: getattr(row, c.key) for c in column_attrs if c.key not in deferred
+    }
+    return {**current_columns, **inherited_columns}
+
+
+def build_rows(model, count: int) -> list:
+    """count rows of model, each column holding a value of its type."""
+
+    values = {int: 42, str: "Some name", bool: True}
+    columns = [
+        column
+        for column in model.__table__.columns
+        if not column.primary_key
+        and getattr(column.type, "python_type", None) in values
+    ]
+    return [
+        model(id=i, **{c.key: values[c.type.python_type] for c in columns})
+        for i in range(count)
+    ]
+
+
+def time_per_row(serialize, rows: list, repeat: int = 5) -> float:
+    """Median seconds spent serializing a row."""
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            serialize(row)
+        durations.append((time.perf_counter() - start) / len(rows))
+    return statistics.median(durations)
+
+
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: model.__name__)
+def test_serializer_matches_legacy_as_dict(model):
+    rows = build_rows(model, ROWS)
+    compiled = serializer(model)
+
+    assert compiled(rows[0]) == legacy_as_dict(rows[0])
+    assert list(compiled(rows[0])) == list(legacy_as_dict(rows[0]))
+    assert rows[0].as_dict() == legacy_as_dict(rows[0])
+    # compiled once per model, the previous as_dict inspecting the mapper every row
+    assert time_per_row(compiled, rows) < time_per_row(legacy_as_dict, rows)
+
+
+def test_serializer_fields_and_exclude():
+    song = build_rows(Song, 1)[0]
+
+    assert serializer(Song, fields=["song_name", "id"])(song) == {
+        "song_name": "Some name",
+        "id": 0,
+    }
+    assert "content_hash" not in serializer(Song, exclude=["content_hash"])(song)
+    anime = build_rows(Anime, 1)[0]
+    assert anime.as_dict(exclude=["content_hash"]) == {
+        key: value
+        for key, value in legacy_as_dict(anime).items()
+        if key != "content_hash"
+    }
+
+    with pytest.raises(ValueError):
+        serializer(Song, fields=["no_such_column"])
+
+
+def test_serializer_json_safe():
+    invoice = Invoice(
+        id=1,
+        issued_at=datetime.datetime(2024, 5, 1, 12, 30),
+        due=datetime.date(2024, 6, 1),
+        amount=decimal.Decimal("12.50"),
+    )
+
+    assert serializer(Invoice)(invoice)["amount"] == decimal.Decimal("12.50")
+    assert serializer(Invoice, json_safe=True)(invoice) == {
+        "id": 1,
+        "issued_at": "2024-05-01T12:30:00",
+        "due": "2024-06-01",
+        "amount": 12.5,
+    }
+    assert serializer(Invoice, json_safe=True)(Invoice(id=2))["due"] is None
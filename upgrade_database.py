@@ -0,0 +1,35 @@
+# Standard libraries
+import os
+
+# External libraries
+from dotenv import dotenv_values
+
+# ORM
+from sqlalchemy import create_engine
+
+# models
+from src.models.schema import upgrade_schema
+
+config = {
+    **dotenv_values(".env.shared"),  # load shared development variables
+    **dotenv_values(".env.secret"),  # load sensitive variables
+    **os.environ,  # override loaded values with environment variables
+}
+
+sql_alchemy_uri = f'postgresql://{config["POSTGRES_USER"]}:{config["POSTGRES_PASSWORD"]}@{config["POSTGRES_HOST"]}:{config["POSTGRES_PORT"]}/{config["POSTGRES_DB"]}'
+
+
+def main():
+    """
+    Bring an existing database up to the current schema: the PostgreSQL extensions,
+    tables, columns and indexes added since its creation, see src/models/schema.py.
+    """
+
+    engine = create_engine(sql_alchemy_uri)
+    with engine.begin() as connection:
+        upgrade_schema(connection)
+    print("Database schema upgraded")
+
+
+if __name__ == "__main__":
+    main()